@@ -6,14 +6,20 @@ identifies user intent, and returns appropriate responses.
 """
 
 import json
+import logging
+import os
 import time
+import uuid
 from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Dict, Any
 
+import orjson
 import uvicorn
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from starlette.exceptions import HTTPException as StarletteHTTPException
 from pydantic import ValidationError
 
 # 导入配置模块和处理模块
@@ -21,10 +27,26 @@ from src.config import init_config, reload_config
 from src.process import process_message
 from src.util import MessageRequest, MessageResponse
 from src.util import IntentRecognitionRequest, IntentRecognitionResponse
-from src.util import call_openapi_model
-from src.logging_config import init_logging, get_logger, log_request
+from src.util import call_openapi_model, init_http_client, close_http_client
+from src.intents import DEFAULT_INTENTS, DEFAULT_INTENTS_SET, DEFAULT_INTENTS_JOINED, PROMPT_TEMPLATES, join_intents
+from src.intents import get_cached_intent, cache_intent
+from src.logging_config import init_logging, get_logger, shutdown_logging
 from src.auth import verify_token
 
+logger = get_logger("chatai-api")
+access_logger = get_logger("chatai-access")
+
+# 固定内容的错误响应体，在模块导入时预先序列化
+_USER_ID_MISMATCH_BODY = orjson.dumps({"detail": "Token中的用户ID与请求不符"})
+_PAYLOAD_TOO_LARGE_BODY = orjson.dumps({"detail": "请求体过大"})
+
+# 请求体大小上限（字节），超过则在解析JSON之前直接拒绝
+MAX_REQUEST_BODY_SIZE = int(os.getenv("MAX_REQUEST_BODY_SIZE", "1048576"))
+
+# 在模块导入时读取并解析日志配置，多worker启动时不再重复读取文件
+_LOGGING_CONFIG_PATH = Path("config/logging_config.json")
+_LOGGING_CONFIG = json.loads(_LOGGING_CONFIG_PATH.read_bytes()) if _LOGGING_CONFIG_PATH.exists() else None
+
 # 定义lifespan上下文管理器
 @asynccontextmanager
 async def lifespan(app_instance: FastAPI):
@@ -32,29 +54,31 @@ async def lifespan(app_instance: FastAPI):
     Application lifespan context manager that handles startup and shutdown events.
     """
     # 启动时执行 - 初始化日志配置
-    logging_config_path = Path("config/logging_config.json")
-    if logging_config_path.exists():
-        with open(logging_config_path, 'r', encoding='utf-8') as f:
-            logging_config = json.load(f)
-        init_logging(logging_config)
-    else:
-        init_logging()
+    log_config = init_logging(_LOGGING_CONFIG) if _LOGGING_CONFIG else init_logging()
+    app_instance.state.log_listener = log_config.listener
     
-    logger = get_logger("chatai-api")
     logger.info("正在初始化配置...")
     config = init_config()
     logger.info("配置初始化完成，已加载 %d 种业务类型", len(config.get('business_types', {})))
     
-    yield
+    # 创建共享的HTTP客户端，大模型和后端服务调用复用连接池
+    app_instance.state.http_client = init_http_client()
     
-    # 关闭时执行
-    logger.info("应用关闭，释放资源...")
+    try:
+        yield
+    finally:
+        # 关闭时执行
+        logger.info("应用关闭，释放资源...")
+        await close_http_client()
+        # 停止后台日志线程，写出队列中剩余的日志
+        shutdown_logging()
 
 # 初始化FastAPI应用
 app = FastAPI(
     title="ChatAI API",
     description="处理聊天消息的API服务",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -67,47 +91,113 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# HTTP异常响应同样使用orjson序列化
+@app.exception_handler(StarletteHTTPException)
+async def http_exception_handler(request: Request, exc: StarletteHTTPException):
+    """Serialize HTTPException error bodies with orjson, matching the default response class."""
+    return ORJSONResponse(
+        {"detail": exc.detail},
+        status_code=exc.status_code,
+        headers=getattr(exc, "headers", None)
+    )
+
+# 请求体大小限制中间件
+class RequestBodySizeLimitMiddleware:
+    """
+    Reject request bodies larger than MAX_REQUEST_BODY_SIZE.
+
+    Requests declaring an oversized Content-Length are rejected before the app runs;
+    bodies without a usable Content-Length (e.g. chunked uploads) are counted while
+    they are received and rejected with 413 as soon as the limit is exceeded.
+    """
+
+    def __init__(self, app, max_body_size: int):
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > self.max_body_size:
+                    await Response(content=_PAYLOAD_TOO_LARGE_BODY, status_code=413,
+                                   media_type="application/json")(scope, receive, send)
+                    return
+                break
+
+        received = 0
+
+        async def receive_limited():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    # 在请求体解析阶段抛出，由异常处理器返回413
+                    raise HTTPException(status_code=413, detail="请求体过大")
+            return message
+
+        await self.app(scope, receive_limited, send)
+
+app.add_middleware(RequestBodySizeLimitMiddleware, max_body_size=MAX_REQUEST_BODY_SIZE)
+
 # 请求处理时间中间件
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
     """Middleware to add processing time to response headers."""
-    start_time = time.time()
-    logger = get_logger("chatai-access")
+    start_time = time.monotonic()
+    # 为每个请求生成唯一ID，供下游处理函数和日志关联使用
+    request_id = uuid.uuid4().hex
+    request.state.request_id = request_id
+    
+    # 请求信息只读取一次，开始、完成和异常日志共用
+    method = request.method
+    url = str(request.url)
+    client_ip = request.client.host if request.client else 'unknown'
+    user_agent = request.headers.get('user-agent', 'unknown')
     
     # 记录请求开始
-    logger.info(f"收到HTTP请求", extra={
-        'method': request.method,
-        'url': str(request.url),
-        'client_ip': request.client.host if request.client else 'unknown',
-        'user_agent': request.headers.get('user-agent', 'unknown'),
-        'request_id': id(request)
-    })
+    if access_logger.isEnabledFor(logging.INFO):
+        access_logger.info("收到HTTP请求", extra={
+            'method': method,
+            'url': url,
+            'client_ip': client_ip,
+            'user_agent': user_agent,
+            'request_id': request_id
+        })
     
     try:
         response = await call_next(request)
-        process_time = time.time() - start_time
-        response.headers["X-Process-Time"] = str(process_time)
+        process_time = time.monotonic() - start_time
+        response.headers["X-Process-Time"] = f"{process_time:.6f}"
         
         # 记录请求完成
-        logger.info(f"HTTP请求处理完成", extra={
-            'method': request.method,
-            'url': str(request.url),
-            'status_code': response.status_code,
-            'process_time': round(process_time, 3),
-            'request_id': id(request)
-        })
+        if access_logger.isEnabledFor(logging.INFO):
+            access_logger.info("HTTP请求处理完成", extra={
+                'method': method,
+                'url': url,
+                'client_ip': client_ip,
+                'user_agent': user_agent,
+                'status_code': response.status_code,
+                'process_time': round(process_time, 3),
+                'request_id': request_id
+            })
         
         return response
     except Exception as e:
-        process_time = time.time() - start_time
+        process_time = time.monotonic() - start_time
         
         # 记录请求异常
-        logger.error(f"HTTP请求处理异常", extra={
-            'method': request.method,
-            'url': str(request.url),
+        access_logger.error("HTTP请求处理异常", extra={
+            'method': method,
+            'url': url,
+            'client_ip': client_ip,
             'error': str(e),
             'process_time': round(process_time, 3),
-            'request_id': id(request)
+            'request_id': request_id
         }, exc_info=True)
         
         raise
@@ -116,7 +206,6 @@ async def add_process_time_header(request: Request, call_next):
 @app.post("/reload_config", response_model=Dict[str, Any])
 async def api_reload_config():
     """重新加载配置文件"""
-    logger = get_logger("chatai-api")
     try:
         logger.info("管理员请求重新加载配置", extra={
             'operation': 'reload_config',
@@ -147,74 +236,76 @@ async def api_reload_config():
 
 # 处理消息的API接口
 @app.post("/process", response_model=MessageResponse)
-async def api_process_message(request: MessageRequest):
+async def api_process_message(request: MessageRequest, http_request: Request):
     """处理接收到的消息"""
-    logger = get_logger("chatai-api")
-    request_start_time = time.time()
+    request_start_time = time.monotonic()
+    request_id = getattr(http_request.state, 'request_id', None)
     
     try:
-        logger.info("开始处理消息请求", extra={
-            'session_id': request.session_id,
-            'user_id': getattr(request, 'user_id', 'unknown'),
-            'message_type': getattr(request, 'type', None),
-            'language': getattr(request, 'language', 'unknown'),
-            'site': getattr(request, 'site', 'unknown'),
-            'has_images': bool(getattr(request, 'images', [])),
-            'has_history': bool(getattr(request, 'history', [])),
-            'status': getattr(request, 'status', 'unknown'),
-            'platform': getattr(request, 'platform', 'unknown')
-        })
-        
-        # 记录请求日志
-        log_request(
-            session_id=request.session_id,
-            user_id=getattr(request, 'user_id', None),
-            message_type=getattr(request, 'type', None),
-            language=getattr(request, 'language', 'unknown'),
-            site=getattr(request, 'site', 'unknown')
-        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("开始处理消息请求", extra={
+                'request_id': request_id,
+                'session_id': request.session_id,
+                'user_id': request.user_id,
+                'message_type': request.type,
+                'language': request.language,
+                'site': request.site,
+                'has_images': bool(request.images),
+                'has_history': bool(request.history),
+                'status': request.status,
+                'platform': request.platform
+            })
         
         # 调用处理函数，直接传递请求对象
         response = await process_message(request)
         
-        processing_time = time.time() - request_start_time
+        processing_time = time.monotonic() - request_start_time
         
-        logger.info("消息处理完成", extra={
-            'session_id': request.session_id,
-            'user_id': getattr(request, 'user_id', 'unknown'),
-            'processing_time': round(processing_time, 3),
-            'final_status': response.status,
-            'response_stage': response.stage,
-            'transfer_human': response.transfer_human,
-            'business_type': response.type,
-            'response_length': len(response.response) if response.response else 0
-        })
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("消息处理完成", extra={
+                'request_id': request_id,
+                'session_id': request.session_id,
+                'user_id': request.user_id,
+                'processing_time': round(processing_time, 3),
+                'final_status': response.status,
+                'response_stage': response.stage,
+                'transfer_human': response.transfer_human,
+                'business_type': response.type,
+                'response_length': len(response.response) if response.response else 0
+            })
         
         return response
         
     except ValidationError as e:
-        processing_time = time.time() - request_start_time
-        logger.warning("请求参数验证错误", extra={
-            'session_id': getattr(request, 'session_id', 'unknown'),
-            'error': str(e),
-            'error_type': 'validation_error',
-            'processing_time': round(processing_time, 3)
-        })
+        # 客户端参数错误属于预期情况，只记录简要信息，详细字段仅在DEBUG级别输出
+        logger.info("请求参数验证错误: %s", e)
+        if logger.isEnabledFor(logging.DEBUG):
+            processing_time = time.monotonic() - request_start_time
+            logger.debug("请求参数验证错误详情", extra={
+                'session_id': getattr(request, 'session_id', 'unknown'),
+                'error': str(e),
+                'error_type': 'validation_error',
+                'processing_time': round(processing_time, 3)
+            })
         raise HTTPException(status_code=422, detail=str(e)) from e
         
     except ValueError as e:
-        processing_time = time.time() - request_start_time
-        logger.warning("请求参数错误", extra={
-            'session_id': getattr(request, 'session_id', 'unknown'),
-            'error': str(e),
-            'error_type': 'value_error',
-            'processing_time': round(processing_time, 3)
-        })
+        # 客户端参数错误属于预期情况，只记录简要信息，详细字段仅在DEBUG级别输出
+        logger.info("请求参数错误: %s", e)
+        if logger.isEnabledFor(logging.DEBUG):
+            processing_time = time.monotonic() - request_start_time
+            logger.debug("请求参数错误详情", extra={
+                'session_id': getattr(request, 'session_id', 'unknown'),
+                'error': str(e),
+                'error_type': 'value_error',
+                'processing_time': round(processing_time, 3)
+            })
         raise HTTPException(status_code=422, detail=str(e)) from e
         
     except Exception as e:
-        processing_time = time.time() - request_start_time
+        processing_time = time.monotonic() - request_start_time
         logger.error("消息处理失败", extra={
+            'request_id': request_id,
             'session_id': getattr(request, 'session_id', 'unknown'),
             'user_id': getattr(request, 'user_id', 'unknown'),
             'error': str(e),
@@ -223,32 +314,11 @@ async def api_process_message(request: MessageRequest):
         }, exc_info=True)
         raise HTTPException(status_code=500, detail=f"消息处理失败: {str(e)}") from e
 
-# 预定义意图列表
-DEFAULT_INTENTS = [
-    "没有收到款项",
-    "收到款项订单已回调",
-    "等待1-7个工作日退款", 
-    "提供转账人信息",
-    "提现处理中",
-    "已出款成功",
-    "重新提交提现申请",
-    "等待第三方支付",
-    "客户收款卡已限额",
-    "客户收款卡号错误",
-    "客户收款银行维护",
-    "修改客户收款卡",
-    "客户卡号异常",
-    "请日切后重新提交订单",
-    "订单款项已回冲",
-    "订单已重新出款"
-]
-
 # 意图识别接口
 @app.post("/chat/recognize_intent", response_model=IntentRecognitionResponse)
 async def recognize_intent(request: IntentRecognitionRequest):
     """意图识别接口，支持自定义意图列表或使用默认意图列表"""
-    logger = get_logger("chatai-api")
-    request_start_time = time.time()
+    request_start_time = time.monotonic()
     
     try:
         logger.info("开始处理意图识别请求", extra={
@@ -259,6 +329,16 @@ async def recognize_intent(request: IntentRecognitionRequest):
             'intents_count': len(request.intents) if request.intents else 0
         })
         
+        # 空文本不需要调用大模型，在验证token之前直接返回空意图
+        text = request.text or ""
+        if not text:
+            logger.info("文本为空，返回空意图", extra={
+                'session_id': request.session_id,
+                'user_id': request.user_id,
+                'has_text': bool(text)
+            })
+            return IntentRecognitionResponse(text=text, intent="")
+        
         # 验证token
         is_valid, token_user_id, error_msg = verify_token(request.token)
         if not is_valid:
@@ -276,63 +356,33 @@ async def recognize_intent(request: IntentRecognitionRequest):
                 'request_user_id': request.user_id,
                 'token_user_id': token_user_id
             })
-            raise HTTPException(status_code=403, detail="Token中的用户ID与请求不符")
+            return Response(content=_USER_ID_MISMATCH_BODY, status_code=403, media_type="application/json")
         
-        text = request.text or ""
         # 如果用户没有提供意图列表，使用默认意图列表
-        intents = request.intents if request.intents else DEFAULT_INTENTS
-        
-        # 如果没有文本，直接返回空意图
-        if not text:
-            logger.info("文本为空，返回空意图", extra={
-                'session_id': request.session_id,
-                'user_id': request.user_id,
-                'has_text': bool(text)
-            })
-            return IntentRecognitionResponse(text=text, intent="")
+        intents = set(request.intents) if request.intents else DEFAULT_INTENTS_SET
         
         # 检查文本是否直接在意图列表中（后端会把所有回复都带过来）
         if text in intents:
             return IntentRecognitionResponse(text=text, intent=text)
         
-        # 构造大模型提示词，根据语言调整
-        language = request.language or "zh"  # 默认中文
+        # 构造大模型提示词，根据语言调整，未支持的语言默认中文
+        language = request.language or "zh"
+        template = PROMPT_TEMPLATES.get(language, PROMPT_TEMPLATES["zh"])
+        
+        intents_joined = join_intents(tuple(request.intents)) if request.intents else DEFAULT_INTENTS_JOINED
+        
+        # 相同语言、文本和候选意图的请求直接返回缓存结果，不再调用大模型
+        cache_key = (language, text, intents_joined)
+        cached_intent = get_cached_intent(cache_key)
+        if cached_intent is not None:
+            logger.debug("意图识别命中缓存", extra={
+                'session_id': request.session_id,
+                'user_id': request.user_id,
+                'recognized_intent': cached_intent
+            })
+            return IntentRecognitionResponse(text=text, intent=cached_intent)
         
-        if language == "en":
-            prompt = (
-                "You are an intent recognition assistant. Please select the most matching intent from the intent list below for the user input. Only return the intent itself, do not return other content.\n"
-                f"User input: {text}\n"
-                f"Available intents: {', '.join(intents)}\n"
-                "Please only return the most matching intent string. If no suitable intent is found, return an empty string."
-            )
-        elif language == "th":
-            prompt = (
-                "คุณเป็นผู้ช่วยในการจดจำความตั้งใจ กรุณาเลือกความตั้งใจที่ตรงกับการป้อนข้อมูลของผู้ใช้มากที่สุดจากรายการความตั้งใจด้านล่าง ส่งคืนเฉพาะความตั้งใจเท่านั้น ไม่ต้องส่งคืนเนื้อหาอื่น\n"
-                f"การป้อนข้อมูลของผู้ใช้: {text}\n"
-                f"ความตั้งใจที่มีอยู่: {', '.join(intents)}\n"
-                "กรุณาส่งคืนเฉพาะสตริงความตั้งใจที่ตรงกันมากที่สุด หากไม่พบความตั้งใจที่เหมาะสม ให้ส่งคืนสตริงว่าง"
-            )
-        elif language == "tl":
-            prompt = (
-                "Ikaw ay isang intent recognition assistant. Mangyaring piliin ang pinakatugmang intent mula sa listahan ng intent sa ibaba para sa input ng user. Ibalik lang ang intent mismo, huwag magbalik ng ibang content.\n"
-                f"Input ng user: {text}\n"
-                f"Available na mga intent: {', '.join(intents)}\n"
-                "Mangyaring ibalik lang ang pinakatugmang intent string. Kung walang suitable na intent, ibalik ang empty string."
-            )
-        elif language == "ja":
-            prompt = (
-                "あなたは意図認識アシスタントです。以下の意図リストからユーザー入力に最も適合する意図を選択してください。意図そのもののみを返し、その他の内容は返さないでください。\n"
-                f"ユーザー入力: {text}\n"
-                f"利用可能な意図: {', '.join(intents)}\n"
-                "最も適合する意図文字列のみを返してください。適切な意図が見つからない場合は、空文字列を返してください。"
-            )
-        else:  # 默认中文
-            prompt = (
-                "你是一个意图识别助手。请从下面的意图列表中选择最符合用户输入的意图，只返回意图本身，不要返回其他内容。\n"
-                f"用户输入: {text}\n"
-                f"可选意图: {', '.join(intents)}\n"
-                "请只返回最匹配的意图字符串，如果没有合适的意图请返回空字符串。"
-            )
+        prompt = template.format(text=text, intents=intents_joined)
         
         try:
             llm_response = await call_openapi_model(prompt=prompt)
@@ -341,23 +391,28 @@ async def recognize_intent(request: IntentRecognitionRequest):
             # 验证返回的意图是否在候选列表中
             if intent not in intents:
                 intent = ""
+            
+            # 只缓存有效意图；空结果可能来自大模型服务异常时的兜底回复
+            if intent:
+                cache_intent(cache_key, intent)
                 
-            processing_time = time.time() - request_start_time
+            processing_time = time.monotonic() - request_start_time
             
-            logger.info("意图识别完成", extra={
-                'session_id': request.session_id,
-                'user_id': request.user_id,
-                'text': text,
-                'recognized_intent': intent,
-                'processing_time': round(processing_time, 3),
-                'intent_found': bool(intent),
-                'used_default_intents': not bool(request.intents)
-            })
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("意图识别完成", extra={
+                    'session_id': request.session_id,
+                    'user_id': request.user_id,
+                    'text': text,
+                    'recognized_intent': intent,
+                    'processing_time': round(processing_time, 3),
+                    'intent_found': bool(intent),
+                    'used_default_intents': not bool(request.intents)
+                })
             
             return IntentRecognitionResponse(text=text, intent=intent)
             
         except Exception as llm_error:
-            processing_time = time.time() - request_start_time
+            processing_time = time.monotonic() - request_start_time
             logger.error("LLM调用失败，返回空意图", extra={
                 'session_id': request.session_id,
                 'user_id': request.user_id,
@@ -371,7 +426,7 @@ async def recognize_intent(request: IntentRecognitionRequest):
         # 重新抛出HTTP异常
         raise
     except Exception as e:
-        processing_time = time.time() - request_start_time
+        processing_time = time.monotonic() - request_start_time
         logger.error("意图识别处理失败", extra={
             'session_id': getattr(request, 'session_id', 'unknown'),
             'user_id': getattr(request, 'user_id', 'unknown'),
@@ -387,10 +442,9 @@ async def api_get_available_intents():
     """
     获取可用的意图列表
     """
-    logger = get_logger("chatai-api")
     
     try:
-        intents = DEFAULT_INTENTS.copy()
+        intents = DEFAULT_INTENTS
         
         logger.info("获取可用意图列表", extra={
             'intents_count': len(intents),
@@ -419,5 +473,19 @@ async def health_check():
 
 # 主函数
 if __name__ == "__main__":
-    # 启动服务
-    uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
+    # 启动服务：开发环境使用热重载，其他环境使用uvloop和httptools并启动多个worker
+    if os.getenv("ENV") == "dev":
+        uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
+    else:
+        uvicorn.run(
+            "app:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=int(os.getenv("WORKERS") or os.cpu_count() or 1),
+            loop="uvloop",
+            http="httptools",
+            log_config=None,
+            # 部署在反向代理之后时，从X-Forwarded-*头中还原客户端IP和协议
+            proxy_headers=True,
+            forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+        )
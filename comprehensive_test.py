@@ -5,29 +5,220 @@ ChatAI 全方位测试脚本
 包含基础功能、业务流程、意图识别、多语言、订单号提取、错误处理、性能等全面测试
 """
 
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import logging
+import mmap
+import re
 import time
 import asyncio
+import functools
 import threading
 import statistics
-from typing import Dict, Any, List, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import Counter
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor, ALL_COMPLETED, as_completed, wait
 from datetime import datetime
 import os
+import sys
+from types import MappingProxyType
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumpb = orjson.dumps
+    
+    def _json_dumpb_indent(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:  # 未安装orjson时回退到标准库json
+    orjson = None
+    _json_loads = json.loads
+    
+    def _json_dumpb(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+    
+    def _json_dumpb_indent(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def _json_dumps(obj: Any) -> str:
+    return _json_dumpb(obj).decode('utf-8')
+
+try:
+    import numpy as np
+except ImportError:  # 未安装numpy时使用标准库statistics统计
+    np = None
+
+
+def _summarize_times(times: List[float]) -> Tuple[float, float, float, float]:
+    """
+    统计响应时间
+    
+    :param times: 响应时间列表（秒），不能为空
+    :return: (平均值, 最大值, 最小值, P95)
+    """
+    if np is not None:
+        arr = np.asarray(times, dtype=np.float64)
+        return float(arr.mean()), float(arr.max()), float(arr.min()), float(np.percentile(arr, 95))
+    # 与numpy默认的线性插值保持一致
+    p95 = statistics.quantiles(times, n=20, method="inclusive")[18] if len(times) > 1 else times[0]
+    return statistics.mean(times), max(times), min(times), p95
+
+
+def _parse_response(response, keys: Optional[Tuple[str, ...]] = None) -> Any:
+    """
+    解析响应体，指定keys时只保留调用方需要检查的字段
+    
+    :param response: requests或httpx的响应对象
+    :param keys: 需要保留的字段，为None时返回完整结果
+    :return: 解析后的响应数据
+    """
+    # 服务端接口都返回JSON，直接解析原始字节，解析失败再回退为文本
+    try:
+        data = _json_loads(response.content)
+    except ValueError:
+        return response.text
+    if keys is not None and isinstance(data, dict):
+        return {key: data[key] for key in keys if key in data}
+    return data
+
+def _splice_json(prefix: bytes, **fields: Any) -> bytes:
+    """
+    在预序列化的JSON对象前缀后拼接变化的字段，固定部分只需序列化一次
+    
+    :param prefix: 去掉末尾'}'的非空JSON对象字节串
+    :param fields: 需要追加的字段
+    :return: 完整的JSON请求体
+    """
+    parts = [prefix]
+    for key, value in fields.items():
+        parts.append(b',"' + key.encode('utf-8') + b'":' + _json_dumpb(value))
+    parts.append(b"}")
+    return b"".join(parts)
+
+
+def _load_json_file(path: str) -> Any:
+    """
+    通过mmap读取JSON文件，orjson可直接解析映射的内存，无需额外的读缓冲
+    
+    :param path: 文件路径
+    :return: 解析后的数据
+    """
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if orjson is None:
+            return json.loads(mm[:])
+        with memoryview(mm) as view:
+            return orjson.loads(view)
+
+
+class _PoolFullCounter(logging.Handler):
+    """统计urllib3连接池已满的警告次数"""
+    
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.count = 0
+    
+    def emit(self, record):
+        if record.getMessage().startswith("Connection pool is full"):
+            self.count += 1
+
+
+class Resp(NamedTuple):
+    """单次请求的结果"""
+    ok: bool                # 请求是否成功发出并收到响应
+    status: Optional[int]   # HTTP状态码
+    data: Any               # 解析后的响应数据
+    rt: Optional[float]     # 响应时间（秒）
+    err: Optional[str]      # 请求异常信息
+
+
+def _success_result(response, keys: Optional[Tuple[str, ...]] = None) -> Resp:
+    """构造请求成功时的结果"""
+    return Resp(True, response.status_code, _parse_response(response, keys),
+                response.elapsed.total_seconds(), None)
+
+
+def _error_result(e: Exception) -> Resp:
+    """构造请求异常时的结果"""
+    return Resp(False, None, None, None, str(e))
+
+# 18位订单号（前后不能紧邻其他数字），与服务端的提取规则一致
+_ORDER18 = re.compile(r'(?<!\d)\d{18}(?!\d)')
+
+# 各测试请求共用的只读字段，用例只需合并自己变化的字段
+# （history是可变列表，由各用例单独创建，避免流程测试中extend污染模板）
+_BASE_PAYLOAD = MappingProxyType({
+    "platform": "web",
+    "site": 1,
+    "transfer_human": 0
+})
+_SERVICE_PAYLOADS = {
+    service: MappingProxyType({**_BASE_PAYLOAD, "language": "zh", "status": 1, "type": service})
+    for service in ("S001", "S002", "S003")
+}
 
 class ComprehensiveTestSuite:
     """全方位测试套件"""
     
-    def __init__(self, base_url: str = "http://127.0.0.1:8000"):
+    _STATUS_ICONS = ("❌", "✅")
+    _BANNER = "=" * 80
+    _BANNER_NL = "\n" + _BANNER
+    
+    def __init__(self, base_url: str = "http://127.0.0.1:8000", use_async: bool = False,
+                 inter_test_delay: float = 0):
         self.base_url = base_url
+        self.use_async = use_async
+        # 测试类别之间的间隔秒数，为0时各类别并发执行
+        self.inter_test_delay = inter_test_delay
+        # 各测试类别在不同线程中各自运行事件循环，异步客户端按线程隔离
+        self._local = threading.local()
         self.test_results = []
         self.session_counter = 0
         
+        # 记录结果时只取单调时钟刻度，保存报告时再统一换算为墙上时间
+        self._t0_wall = time.time()
+        self._t0_mono = time.monotonic_ns()
+        
+        # 完整结果（含响应数据）逐条追加写入NDJSON，内存中只保留汇总所需的字段
+        self.results_file = f"test_results_{int(self._t0_wall)}.ndjson"
+        self._results_fp = open(self.results_file, "wb", buffering=1 << 20)
+        
+        # 测试请求以网络I/O为主，使用线程池并发发送相互独立的用例
+        self.max_workers = int(os.getenv("CHATAI_TEST_WORKERS") or min(32, (os.cpu_count() or 1) * 5))
+        # 性能测试中并发突发请求的数量
+        self.burst_size = int(os.getenv("CHATAI_TEST_BURST", "200"))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._lock = threading.Lock()
+        
+        # 复用连接池，避免每个请求重新建立TCP连接；连接池需大于并发线程数，否则工作线程会争抢连接
+        self.pool_maxsize = int(os.getenv("CHATAI_TEST_POOL") or max(32, self.max_workers * 2))
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=self.pool_maxsize,
+                              pool_block=False, max_retries=Retry(total=0))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+        
+        # /process是绝大多数用例的调用路径，预先绑定URL和超时
+        self._process_url = f"{self.base_url}/process"
+        self._post_process = functools.partial(self.session.post, self._process_url, timeout=30)
+        
+    def close(self):
+        """关闭HTTP会话、线程池和结果文件"""
+        self.executor.shutdown(wait=True)
+        self.session.close()
+        if not self._results_fp.closed:
+            self._results_fp.close()
+        
     def get_session_id(self) -> str:
         """生成唯一会话ID"""
-        self.session_counter += 1
-        return f"test_session_{int(time.time())}_{self.session_counter}"
+        with self._lock:
+            self.session_counter += 1
+            counter = self.session_counter
+        return f"test_session_{int(time.time())}_{counter}"
     
     def log_test(self, category: str, test_name: str, success: bool, 
                  details: Dict = None, response_data: Dict = None):
@@ -36,121 +227,210 @@ class ComprehensiveTestSuite:
             "category": category,
             "test_name": test_name,
             "success": success,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp_ns": time.monotonic_ns(),
             "details": details or {},
             "response_data": response_data
         }
-        self.test_results.append(result)
+        line = _json_dumpb(result) + b"\n"
+        del result["response_data"]
         
-        status = "✅" if success else "❌"
-        print(f"{status} [{category}] {test_name}")
+        output = [f"{self._STATUS_ICONS[bool(success)]} [{category}] {test_name}"]
         if details:
             for key, value in details.items():
-                print(f"    {key}: {value}")
+                output.append(f"    {key}: {value}")
         if not success and response_data:
-            print(f"    错误详情: {json.dumps(response_data, ensure_ascii=False)[:200]}")
+            output.append(f"    错误详情: {_json_dumps(response_data)[:200]}")
+        
+        with self._lock:
+            self._results_fp.write(line)
+            self.test_results.append(result)
+        self._emit(output)
+    
+    def _emit(self, lines: List[str]):
+        """输出若干行：并发执行的测试类别先写入本线程缓冲区，否则在锁内一次打印"""
+        buffer = getattr(self._local, "output", None)
+        if buffer is not None:
+            buffer.extend(lines)
+            return
+        with self._lock:
+            print("\n".join(lines))
+    
+    def _print_section(self, title: str):
+        """输出测试类别标题"""
+        self._emit([self._BANNER_NL, title, self._BANNER])
+    
+    def _run_buffered(self, test_func):
+        """在工作线程中执行一个测试类别，标题和全部结果在结束时通过同一次加锁写出，不与其他类别交错"""
+        self._local.output = []
+        try:
+            test_func()
+        finally:
+            output = self._local.output
+            self._local.output = None
+            if output:
+                with self._lock:
+                    sys.stdout.write("\n".join(output) + "\n")
     
     def make_request(self, endpoint: str, method: str = "GET", 
-                    payload: Dict = None, timeout: int = 30) -> Dict[str, Any]:
-        """发送HTTP请求"""
+                    payload: Dict = None, timeout: int = 30,
+                    keys: Optional[Tuple[str, ...]] = None) -> Resp:
+        """发送HTTP请求，keys用于只保留需要检查的响应字段"""
         try:
             url = f"{self.base_url}{endpoint}"
-            headers = {"Content-Type": "application/json"}
             
             if method.upper() == "GET":
-                response = requests.get(url, timeout=timeout)
+                response = self.session.get(url, timeout=timeout)
             elif method.upper() == "POST":
-                response = requests.post(url, json=payload, headers=headers, timeout=timeout)
+                response = self.session.post(url, json=payload, timeout=timeout)
             else:
                 raise ValueError(f"不支持的HTTP方法: {method}")
             
-            return {
-                "success": True,
-                "status_code": response.status_code,
-                "data": response.json() if response.headers.get('content-type', '').startswith('application/json') else response.text,
-                "response_time": response.elapsed.total_seconds()
-            }
+            return _success_result(response, keys)
         except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "status_code": None,
-                "data": None,
-                "response_time": None
-            }
+            return _error_result(e)
+    
+    def post_process(self, payload: Union[Dict, bytes],
+                     keys: Optional[Tuple[str, ...]] = None) -> Resp:
+        """发送/process请求，payload可以是字典或已序列化的JSON字节串，返回格式与make_request一致"""
+        try:
+            if isinstance(payload, bytes):
+                response = self._post_process(data=payload)
+            else:
+                response = self._post_process(json=payload)
+            return _success_result(response, keys)
+        except Exception as e:
+            return _error_result(e)
+    
+    @property
+    def aclient(self) -> Optional[httpx.AsyncClient]:
+        """当前线程的异步HTTP客户端"""
+        return getattr(self._local, "aclient", None)
+    
+    async def __aenter__(self):
+        """创建异步HTTP客户端"""
+        self._local.aclient = httpx.AsyncClient(
+            base_url=self.base_url,
+            limits=httpx.Limits(max_keepalive_connections=64, max_connections=128),
+            headers={"Content-Type": "application/json"},
+            timeout=30.0
+        )
+        return self
+    
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        """关闭异步HTTP客户端"""
+        await self.aclient.aclose()
+        self._local.aclient = None
+    
+    async def amake_request(self, endpoint: str, method: str = "GET",
+                            payload: Union[Dict, bytes, None] = None,
+                            keys: Optional[Tuple[str, ...]] = None) -> Resp:
+        """发送异步HTTP请求，返回格式与make_request一致"""
+        try:
+            if method.upper() == "GET":
+                response = await self.aclient.get(endpoint)
+            elif method.upper() == "POST" and isinstance(payload, bytes):
+                response = await self.aclient.post(endpoint, content=payload)
+            elif method.upper() == "POST":
+                response = await self.aclient.post(endpoint, json=payload)
+            else:
+                raise ValueError(f"不支持的HTTP方法: {method}")
+            
+            return _success_result(response, keys)
+        except Exception as e:
+            return _error_result(e)
+    
+    async def _aprocess_all(self, payloads: List[Union[Dict, bytes]],
+                            keys: Optional[Tuple[str, ...]] = None) -> List[Resp]:
+        """在同一个事件循环中并发发送全部/process请求"""
+        async with self:
+            return await asyncio.gather(
+                *(self.amake_request("/process", "POST", payload, keys=keys) for payload in payloads)
+            )
+    
+    async def _timing_burst(self, n: int) -> List[float]:
+        """并发发送n个健康检查请求，返回成功请求各自的响应时间"""
+        async with self:
+            responses = await asyncio.gather(
+                *(self.aclient.get("/health") for _ in range(n)), return_exceptions=True
+            )
+        return [r.elapsed.total_seconds() for r in responses if not isinstance(r, Exception)]
+    
+    def process_concurrently(self, payloads: List[Union[Dict, bytes]],
+                             keys: Optional[Tuple[str, ...]] = None) -> List[Resp]:
+        """并发发送多个/process请求，按payloads顺序返回结果"""
+        if self.use_async:
+            return asyncio.run(self._aprocess_all(payloads, keys))
+        return list(self.executor.map(
+            lambda payload: self.post_process(payload, keys), payloads
+        ))
     
     # ===== 基础功能测试 =====
     def test_basic_functionality(self):
         """测试基础功能"""
-        print("\n" + "="*80)
-        print("🔧 基础功能测试")
-        print("="*80)
+        self._print_section("🔧 基础功能测试")
         
         # 健康检查
         result = self.make_request("/health")
-        if result["success"] and result["status_code"] == 200:
-            data = result["data"]
+        if result.ok and result.status == 200:
+            data = result.data
             if data.get("status") == "ok" and data.get("service") == "ChatAI":
-                self.log_test("基础功能", "健康检查", True, {"响应时间": f"{result['response_time']:.3f}s"})
+                self.log_test("基础功能", "健康检查", True, {"响应时间": f"{result.rt:.3f}s"})
             else:
                 self.log_test("基础功能", "健康检查", False, {"原因": "响应格式错误"}, data)
         else:
-            self.log_test("基础功能", "健康检查", False, {"原因": result.get("error", "请求失败")})
+            self.log_test("基础功能", "健康检查", False, {"原因": result.err or "请求失败"})
         
         # 配置重载
         result = self.make_request("/reload_config", "POST")
-        if result["success"] and result["status_code"] == 200:
-            data = result["data"]
+        if result.ok and result.status == 200:
+            data = result.data
             if data.get("status") == "success":
-                self.log_test("基础功能", "配置重载", True, {"响应时间": f"{result['response_time']:.3f}s"})
+                self.log_test("基础功能", "配置重载", True, {"响应时间": f"{result.rt:.3f}s"})
             else:
                 self.log_test("基础功能", "配置重载", False, {"原因": "重载失败"}, data)
         else:
-            self.log_test("基础功能", "配置重载", False, {"原因": result.get("error", "请求失败")})
+            self.log_test("基础功能", "配置重载", False, {"原因": result.err or "请求失败"})
         
         # 不存在端点测试
         result = self.make_request("/nonexistent")
-        if result["success"] and result["status_code"] == 404:
+        if result.ok and result.status == 404:
             self.log_test("基础功能", "404错误处理", True)
         else:
-            self.log_test("基础功能", "404错误处理", False, {"状态码": result["status_code"]})
+            self.log_test("基础功能", "404错误处理", False, {"状态码": result.status})
     
     # ===== 用户状态测试 =====
     def test_user_status(self):
         """测试用户状态处理"""
-        print("\n" + "="*80)
-        print("👤 用户状态测试")
-        print("="*80)
+        self._print_section("👤 用户状态测试")
         
         # 未登录用户
         payload = {
+            **_BASE_PAYLOAD,
             "session_id": self.get_session_id(),
             "user_id": "test_unauth_user",
-            "platform": "web",
             "language": "zh",
             "status": 0,  # 未登录
-            "messages": "你好，我需要帮助",
-            "site": 1,
-            "transfer_human": 0
+            "messages": "你好，我需要帮助"
         }
         
-        result = self.make_request("/process", "POST", payload)
-        if result["success"] and result["status_code"] == 200:
-            data = result["data"]
-            if data.get("stage") == "unauthenticated" and "登录" in data.get("response", ""):
+        result = self.post_process(payload)
+        if result.ok and result.status == 200:
+            data = result.data
+            response = data.get("response", "")
+            if data.get("stage") == "unauthenticated" and "登录" in response:
                 self.log_test("用户状态", "未登录用户处理", True, {
-                    "响应": data.get("response", "")[:50] + "..."
+                    "响应": response[:50] + "..."
                 })
             else:
                 self.log_test("用户状态", "未登录用户处理", False, {"原因": "响应格式错误"}, data)
         else:
-            self.log_test("用户状态", "未登录用户处理", False, {"原因": result.get("error", "请求失败")})
+            self.log_test("用户状态", "未登录用户处理", False, {"原因": result.err or "请求失败"})
         
         # 已登录用户基础测试
         payload["status"] = 1  # 已登录
-        result = self.make_request("/process", "POST", payload)
-        if result["success"] and result["status_code"] == 200:
-            data = result["data"]
+        result = self.post_process(payload)
+        if result.ok and result.status == 200:
+            data = result.data
             if data.get("session_id") == payload["session_id"]:
                 self.log_test("用户状态", "已登录用户处理", True, {
                     "意图类型": data.get("type", "未识别"),
@@ -159,14 +439,12 @@ class ComprehensiveTestSuite:
             else:
                 self.log_test("用户状态", "已登录用户处理", False, {"原因": "会话ID不匹配"}, data)
         else:
-            self.log_test("用户状态", "已登录用户处理", False, {"原因": result.get("error", "请求失败")})
+            self.log_test("用户状态", "已登录用户处理", False, {"原因": result.err or "请求失败"})
     
     # ===== 意图识别测试 =====
     def test_intent_recognition(self):
         """测试意图识别"""
-        print("\n" + "="*80)
-        print("🎯 意图识别测试")
-        print("="*80)
+        self._print_section("🎯 意图识别测试")
         
         intent_tests = [
             {
@@ -203,23 +481,25 @@ class ComprehensiveTestSuite:
             }
         ]
         
+        payloads = []
         for test in intent_tests:
-            payload = {
+            payloads.append({
+                **_BASE_PAYLOAD,
                 "session_id": self.get_session_id(),
                 "user_id": "test_intent_user",
-                "platform": "web",
                 "language": test.get("language", "zh"),
                 "status": 1,
                 "messages": test["message"],
-                "history": [],
-                "site": 1,
-                "transfer_human": 0
+                "history": []
                 # 不指定type，让系统自动识别
-            }
-            
-            result = self.make_request("/process", "POST", payload)
-            if result["success"] and result["status_code"] == 200:
-                data = result["data"]
+            })
+        
+        # 各用例相互独立，并发发送请求，结果回到主线程按顺序记录
+        results = self.process_concurrently(payloads, keys=("type",))
+        
+        for test, result in zip(intent_tests, results):
+            if result.ok and result.status == 200:
+                data = result.data
                 detected_type = data.get("type", "")
                 if detected_type == test["expected_type"]:
                     self.log_test("意图识别", test["name"], True, {
@@ -233,41 +513,35 @@ class ComprehensiveTestSuite:
                         "消息": test["message"]
                     })
             else:
-                self.log_test("意图识别", test["name"], False, {"原因": result.get("error", "请求失败")})
+                self.log_test("意图识别", test["name"], False, {"原因": result.err or "请求失败"})
     
     # ===== S001充值业务流程测试 =====
     def test_s001_workflow(self):
         """测试S001充值业务流程"""
-        print("\n" + "="*80)
-        print("💰 S001充值业务流程测试")
-        print("="*80)
+        self._print_section("💰 S001充值业务流程测试")
         
         # 阶段1：询问订单号
         session_id = self.get_session_id()
         payload = {
+            **_SERVICE_PAYLOADS["S001"],
             "session_id": session_id,
             "user_id": "test_s001_user",
-            "platform": "web",
-            "language": "zh",
-            "status": 1,
             "messages": "我的充值还没有到账",
-            "history": [],
-            "site": 1,
-            "transfer_human": 0,
-            "type": "S001"
+            "history": []
         }
         
-        result = self.make_request("/process", "POST", payload)
-        if result["success"] and result["status_code"] == 200:
-            data = result["data"]
-            if "订单编号" in data.get("response", ""):
+        result = self.post_process(payload)
+        if result.ok and result.status == 200:
+            data = result.data
+            response = data.get("response", "")
+            if "订单编号" in response:
                 self.log_test("S001流程", "阶段1-询问订单号", True, {
-                    "响应": data.get("response", "")[:50] + "..."
+                    "响应": response[:50] + "..."
                 })
             else:
                 self.log_test("S001流程", "阶段1-询问订单号", False, {"原因": "未正确询问订单号"}, data)
         else:
-            self.log_test("S001流程", "阶段1-询问订单号", False, {"原因": result.get("error", "请求失败")})
+            self.log_test("S001流程", "阶段1-询问订单号", False, {"原因": result.err or "请求失败"})
         
         # 阶段2：不知道订单号
         payload["messages"] = "我不知道订单号在哪里看"
@@ -276,19 +550,20 @@ class ComprehensiveTestSuite:
             {"role": "AI", "content": "您需要查询的【订单编号】是多少？"}
         ]
         
-        result = self.make_request("/process", "POST", payload)
-        if result["success"] and result["status_code"] == 200:
-            data = result["data"]
-            images = data.get("images", [])
-            if images and any("depositOrder" in img for img in images):
+        result = self.post_process(payload)
+        if result.ok and result.status == 200:
+            data = result.data
+            images = data.get("images") or []
+            # 用\0拼接后做一次子串查找，分隔符避免跨元素误匹配
+            if "depositOrder" in "\0".join(images):
                 self.log_test("S001流程", "阶段2-提供指引图片", True, {
                     "图片数量": len(images),
-                    "图片链接": images[0] if images else "无"
+                    "图片链接": images[0]
                 })
             else:
                 self.log_test("S001流程", "阶段2-提供指引图片", False, {"原因": "未返回指引图片"}, data)
         else:
-            self.log_test("S001流程", "阶段2-提供指引图片", False, {"原因": result.get("error", "请求失败")})
+            self.log_test("S001流程", "阶段2-提供指引图片", False, {"原因": result.err or "请求失败"})
         
         # 阶段3：提供18位订单号
         payload["messages"] = "我的订单号是123456789012345678"
@@ -297,9 +572,9 @@ class ComprehensiveTestSuite:
             {"role": "AI", "content": "按照下面图片的指引进行操作"}
         ])
         
-        result = self.make_request("/process", "POST", payload)
-        if result["success"] and result["status_code"] == 200:
-            data = result["data"]
+        result = self.post_process(payload)
+        if result.ok and result.status == 200:
+            data = result.data
             # 由于模拟环境，接口调用可能失败，但应该有相应处理
             self.log_test("S001流程", "阶段3-处理订单号", True, {
                 "转人工": data.get("transfer_human", 0),
@@ -307,58 +582,53 @@ class ComprehensiveTestSuite:
                 "响应": data.get("response", "")[:50] + "..."
             })
         else:
-            self.log_test("S001流程", "阶段3-处理订单号", False, {"原因": result.get("error", "请求失败")})
+            self.log_test("S001流程", "阶段3-处理订单号", False, {"原因": result.err or "请求失败"})
         
         # 阶段3：上传图片测试
         payload["messages"] = "这是我的充值截图"
         payload["images"] = ["https://example.com/payment-screenshot.jpg"]
         
-        result = self.make_request("/process", "POST", payload)
-        if result["success"] and result["status_code"] == 200:
-            data = result["data"]
-            if data.get("transfer_human") == 1:
+        result = self.post_process(payload)
+        if result.ok and result.status == 200:
+            data = result.data
+            transfer_human = data.get("transfer_human", 0)
+            if transfer_human == 1:
                 self.log_test("S001流程", "阶段3-图片上传转人工", True, {
-                    "转人工": data.get("transfer_human", 0),
+                    "转人工": transfer_human,
                     "响应": data.get("response", "")[:50] + "..."
                 })
             else:
                 self.log_test("S001流程", "阶段3-图片上传转人工", False, {"原因": "未转人工"}, data)
         else:
-            self.log_test("S001流程", "阶段3-图片上传转人工", False, {"原因": result.get("error", "请求失败")})
+            self.log_test("S001流程", "阶段3-图片上传转人工", False, {"原因": result.err or "请求失败"})
     
     # ===== S002提现业务流程测试 =====
     def test_s002_workflow(self):
         """测试S002提现业务流程"""
-        print("\n" + "="*80)
-        print("💸 S002提现业务流程测试")
-        print("="*80)
+        self._print_section("💸 S002提现业务流程测试")
         
         # 阶段1：询问提现订单号
         session_id = self.get_session_id()
         payload = {
+            **_SERVICE_PAYLOADS["S002"],
             "session_id": session_id,
             "user_id": "test_s002_user",
-            "platform": "web",
-            "language": "zh",
-            "status": 1,
             "messages": "我的提现还没有到账",
-            "history": [],
-            "site": 1,
-            "transfer_human": 0,
-            "type": "S002"
+            "history": []
         }
         
-        result = self.make_request("/process", "POST", payload)
-        if result["success"] and result["status_code"] == 200:
-            data = result["data"]
-            if "订单编号" in data.get("response", ""):
+        result = self.post_process(payload)
+        if result.ok and result.status == 200:
+            data = result.data
+            response = data.get("response", "")
+            if "订单编号" in response:
                 self.log_test("S002流程", "阶段1-询问订单号", True, {
-                    "响应": data.get("response", "")[:50] + "..."
+                    "响应": response[:50] + "..."
                 })
             else:
                 self.log_test("S002流程", "阶段1-询问订单号", False, {"原因": "未正确询问订单号"}, data)
         else:
-            self.log_test("S002流程", "阶段1-询问订单号", False, {"原因": result.get("error", "请求失败")})
+            self.log_test("S002流程", "阶段1-询问订单号", False, {"原因": result.err or "请求失败"})
         
         # 阶段2：不知道提现订单号
         payload["messages"] = "我不知道提现订单号在哪里看"
@@ -367,19 +637,20 @@ class ComprehensiveTestSuite:
             {"role": "AI", "content": "您需要查询的【订单编号】是多少？"}
         ]
         
-        result = self.make_request("/process", "POST", payload)
-        if result["success"] and result["status_code"] == 200:
-            data = result["data"]
-            images = data.get("images", [])
-            if images and any("withdrawalOrder" in img for img in images):
+        result = self.post_process(payload)
+        if result.ok and result.status == 200:
+            data = result.data
+            images = data.get("images") or []
+            # 用\0拼接后做一次子串查找，分隔符避免跨元素误匹配
+            if "withdrawalOrder" in "\0".join(images):
                 self.log_test("S002流程", "阶段2-提供提现指引图片", True, {
                     "图片数量": len(images),
-                    "图片链接": images[0] if images else "无"
+                    "图片链接": images[0]
                 })
             else:
                 self.log_test("S002流程", "阶段2-提供提现指引图片", False, {"原因": "未返回提现指引图片"}, data)
         else:
-            self.log_test("S002流程", "阶段2-提供提现指引图片", False, {"原因": result.get("error", "请求失败")})
+            self.log_test("S002流程", "阶段2-提供提现指引图片", False, {"原因": result.err or "请求失败"})
         
         # 阶段3：提供18位提现订单号
         payload["messages"] = "我的提现订单号是876543210987654321"
@@ -388,66 +659,60 @@ class ComprehensiveTestSuite:
             {"role": "AI", "content": "按照下面图片的指引进行操作"}
         ])
         
-        result = self.make_request("/process", "POST", payload)
-        if result["success"] and result["status_code"] == 200:
-            data = result["data"]
+        result = self.post_process(payload)
+        if result.ok and result.status == 200:
+            data = result.data
             self.log_test("S002流程", "阶段3-处理提现订单号", True, {
                 "转人工": data.get("transfer_human", 0),
                 "阶段": data.get("stage", ""),
                 "响应": data.get("response", "")[:50] + "..."
             })
         else:
-            self.log_test("S002流程", "阶段3-处理提现订单号", False, {"原因": result.get("error", "请求失败")})
+            self.log_test("S002流程", "阶段3-处理提现订单号", False, {"原因": result.err or "请求失败"})
         
         # 阶段3：上传提现图片测试
         payload["messages"] = "这是我的提现记录截图"
         payload["images"] = ["https://example.com/withdrawal-screenshot.jpg"]
         
-        result = self.make_request("/process", "POST", payload)
-        if result["success"] and result["status_code"] == 200:
-            data = result["data"]
-            if data.get("transfer_human") == 1:
+        result = self.post_process(payload)
+        if result.ok and result.status == 200:
+            data = result.data
+            transfer_human = data.get("transfer_human", 0)
+            if transfer_human == 1:
                 self.log_test("S002流程", "阶段3-图片上传转人工", True, {
-                    "转人工": data.get("transfer_human", 0),
+                    "转人工": transfer_human,
                     "响应": data.get("response", "")[:50] + "..."
                 })
             else:
                 self.log_test("S002流程", "阶段3-图片上传转人工", False, {"原因": "未转人工"}, data)
         else:
-            self.log_test("S002流程", "阶段3-图片上传转人工", False, {"原因": result.get("error", "请求失败")})
+            self.log_test("S002流程", "阶段3-图片上传转人工", False, {"原因": result.err or "请求失败"})
     
     # ===== S003活动业务流程测试 =====
     def test_s003_workflow(self):
         """测试S003活动业务流程"""
-        print("\n" + "="*80)
-        print("🎁 S003活动业务流程测试")
-        print("="*80)
+        self._print_section("🎁 S003活动业务流程测试")
         
         # 阶段1：查询活动列表
         session_id = self.get_session_id()
         payload = {
+            **_SERVICE_PAYLOADS["S003"],
             "session_id": session_id,
             "user_id": "test_s003_user",
-            "platform": "web",
-            "language": "zh",
-            "status": 1,
             "messages": "我想查询一下首存奖励什么时候发放",
-            "history": [],
-            "site": 1,
-            "transfer_human": 0,
-            "type": "S003"
+            "history": []
         }
         
-        result = self.make_request("/process", "POST", payload)
-        if result["success"] and result["status_code"] == 200:
-            data = result["data"]
+        result = self.post_process(payload)
+        if result.ok and result.status == 200:
+            data = result.data
             self.log_test("S003流程", "阶段1-活动查询", True, {
                 "转人工": data.get("transfer_human", 0),
                 "阶段": data.get("stage", ""),
                 "响应": data.get("response", "")[:100] + "..."
             })
         else:
-            self.log_test("S003流程", "阶段1-活动查询", False, {"原因": result.get("error", "请求失败")})
+            self.log_test("S003流程", "阶段1-活动查询", False, {"原因": result.err or "请求失败"})
         
         # 阶段2：用户明确活动
         payload["messages"] = "我要查询首存奖励活动"
@@ -456,23 +721,21 @@ class ComprehensiveTestSuite:
             {"role": "AI", "content": "我为您找到了以下活动，请明确您想查询的具体活动"}
         ]
         
-        result = self.make_request("/process", "POST", payload)
-        if result["success"] and result["status_code"] == 200:
-            data = result["data"]
+        result = self.post_process(payload)
+        if result.ok and result.status == 200:
+            data = result.data
             self.log_test("S003流程", "阶段2-明确活动", True, {
                 "转人工": data.get("transfer_human", 0),
                 "阶段": data.get("stage", ""),
                 "响应": data.get("response", "")[:100] + "..."
             })
         else:
-            self.log_test("S003流程", "阶段2-明确活动", False, {"原因": result.get("error", "请求失败")})
+            self.log_test("S003流程", "阶段2-明确活动", False, {"原因": result.err or "请求失败"})
     
     # ===== 订单号提取测试 =====
     def test_order_number_extraction(self):
         """测试订单号提取功能"""
-        print("\n" + "="*80)
-        print("🔍 订单号提取测试")
-        print("="*80)
+        self._print_section("🔍 订单号提取测试")
         
         order_tests = [
             {
@@ -505,44 +768,54 @@ class ComprehensiveTestSuite:
             }
         ]
         
-        for test in order_tests:
-            payload = {
-                "session_id": self.get_session_id(),
-                "user_id": "test_order_user",
-                "platform": "web",
-                "language": "zh",
-                "status": 1,
-                "messages": test["message"],
-                "history": [
-                    {"role": "user", "content": "我的充值还没有到账"},
-                    {"role": "AI", "content": "您需要查询的【订单编号】是多少？"}
-                ],
-                "site": 1,
-                "transfer_human": 0,
-                "type": "S001"
-            }
-            
-            result = self.make_request("/process", "POST", payload)
-            if result["success"] and result["status_code"] == 200:
-                data = result["data"]
+        # 各用例只有session_id和messages不同，固定部分只序列化一次
+        prefix = _json_dumpb({
+            **_BASE_PAYLOAD,
+            "user_id": "test_order_user",
+            "language": "zh",
+            "status": 1,
+            "history": [
+                {"role": "user", "content": "我的充值还没有到账"},
+                {"role": "AI", "content": "您需要查询的【订单编号】是多少？"}
+            ],
+            "type": "S001"
+        })[:-1]
+        payloads = [
+            _splice_json(prefix, session_id=self.get_session_id(), messages=test["message"])
+            for test in order_tests
+        ]
+        
+        # 各用例相互独立，并发发送请求，结果回到主线程按顺序记录
+        results = self.process_concurrently(payloads, keys=("response", "stage"))
+        
+        for test, result in zip(order_tests, results):
+            # 客户端先用同一规则提取一次，便于和服务端结果对照
+            match = _ORDER18.search(test["message"])
+            extracted_locally = match.group(0) if match else "无"
+            if result.ok and result.status == 200:
+                data = result.data
+                response = data.get("response", "")
                 if test["should_extract"]:
+                    stage = data.get("stage", "")
                     # 应该能提取到订单号，不会要求重新提供
-                    if "订单号" not in data.get("response", "") or data.get("stage") == "finish":
+                    if "订单号" not in response or stage == "finish":
                         self.log_test("订单号提取", test["name"], True, {
                             "消息": test["message"],
                             "期望提取": test.get("expected", "是"),
-                            "阶段": data.get("stage", ""),
+                            "本地提取": extracted_locally,
+                            "阶段": stage,
                         })
                     else:
                         self.log_test("订单号提取", test["name"], False, {
                             "消息": test["message"],
                             "期望提取": test.get("expected", "是"),
+                            "本地提取": extracted_locally,
                             "实际": "未提取到",
-                            "响应": data.get("response", "")[:50] + "..."
+                            "响应": response[:50] + "..."
                         })
                 else:
                     # 不应该提取到，会要求重新提供
-                    if "订单号" in data.get("response", ""):
+                    if "订单号" in response:
                         self.log_test("订单号提取", test["name"], True, {
                             "消息": test["message"],
                             "正确": "未提取无效订单号"
@@ -550,17 +823,16 @@ class ComprehensiveTestSuite:
                     else:
                         self.log_test("订单号提取", test["name"], False, {
                             "消息": test["message"],
+                            "本地提取": extracted_locally,
                             "错误": "错误提取了无效订单号"
                         })
             else:
-                self.log_test("订单号提取", test["name"], False, {"原因": result.get("error", "请求失败")})
+                self.log_test("订单号提取", test["name"], False, {"原因": result.err or "请求失败"})
     
     # ===== 多语言支持测试 =====
     def test_multilingual_support(self):
         """测试多语言支持"""
-        print("\n" + "="*80)
-        print("🌍 多语言支持测试")
-        print("="*80)
+        self._print_section("🌍 多语言支持测试")
         
         language_tests = [
             {
@@ -585,22 +857,24 @@ class ComprehensiveTestSuite:
             }
         ]
         
-        for test in language_tests:
-            # 测试未登录多语言回复
-            payload = {
-                "session_id": self.get_session_id(),
-                "user_id": "test_lang_user",
-                "platform": "web",
-                "language": test["language"],
-                "status": 0,  # 未登录
-                "messages": test["message"],
-                "site": 1,
-                "transfer_human": 0
-            }
-            
-            result = self.make_request("/process", "POST", payload)
-            if result["success"] and result["status_code"] == 200:
-                data = result["data"]
+        # 测试未登录多语言回复，固定部分只序列化一次
+        prefix = _json_dumpb({
+            **_BASE_PAYLOAD,
+            "user_id": "test_lang_user",
+            "status": 0  # 未登录
+        })[:-1]
+        payloads = [
+            _splice_json(prefix, session_id=self.get_session_id(),
+                         language=test["language"], messages=test["message"])
+            for test in language_tests
+        ]
+        
+        # 各用例相互独立，并发发送请求，结果回到主线程按顺序记录
+        results = self.process_concurrently(payloads, keys=("response",))
+        
+        for test, result in zip(language_tests, results):
+            if result.ok and result.status == 200:
+                data = result.data
                 response = data.get("response", "")
                 if response:
                     self.log_test("多语言支持", f"未登录-{test['language']}", True, {
@@ -616,15 +890,13 @@ class ComprehensiveTestSuite:
             else:
                 self.log_test("多语言支持", f"未登录-{test['language']}", False, {
                     "语言": test["language"],
-                    "原因": result.get("error", "请求失败")
+                    "原因": result.err or "请求失败"
                 })
     
     # ===== 错误处理测试 =====
     def test_error_handling(self):
         """测试错误处理"""
-        print("\n" + "="*80)
-        print("⚠️ 错误处理测试")
-        print("="*80)
+        self._print_section("⚠️ 错误处理测试")
         
         # 缺少必要字段
         invalid_payloads = [
@@ -664,101 +936,101 @@ class ComprehensiveTestSuite:
             }
         ]
         
-        for test in invalid_payloads:
-            result = self.make_request("/process", "POST", test["payload"])
-            if result["status_code"] == 422:  # 验证错误
+        results = self.process_concurrently([test["payload"] for test in invalid_payloads])
+        for test, result in zip(invalid_payloads, results):
+            if result.status == 422:  # 验证错误
                 self.log_test("错误处理", test["name"], True, {
-                    "状态码": result["status_code"]
+                    "状态码": result.status
                 })
             else:
                 self.log_test("错误处理", test["name"], False, {
                     "期望状态码": 422,
-                    "实际状态码": result["status_code"],
-                    "响应": str(result.get("data", ""))[:100]
+                    "实际状态码": result.status,
+                    "响应": str(result.data)[:100]
                 })
         
         # 空消息测试
         payload = {
+            **_BASE_PAYLOAD,
             "session_id": self.get_session_id(),
             "user_id": "test_user",
-            "platform": "web",
             "language": "zh", 
             "status": 1,
             "messages": "",  # 空消息
-            "site": 1,
-            "transfer_human": 0
         }
         
-        result = self.make_request("/process", "POST", payload)
-        if result["success"]:
+        result = self.post_process(payload)
+        if result.ok:
             self.log_test("错误处理", "空消息处理", True, {
-                "状态码": result["status_code"]
+                "状态码": result.status
             })
         else:
             self.log_test("错误处理", "空消息处理", False, {
-                "原因": result.get("error", "未知")
+                "原因": result.err or "未知"
             })
     
     # ===== 性能测试 =====
     def test_performance(self):
         """性能测试"""
-        print("\n" + "="*80)
-        print("🚀 性能测试")
-        print("="*80)
+        self._print_section("🚀 性能测试")
         
-        # 响应时间测试
-        response_times = []
-        for i in range(10):
-            result = self.make_request("/health")
-            if result["success"]:
-                response_times.append(result["response_time"])
+        # 响应时间测试：每个请求的耗时单独统计，无需串行发送
+        response_times = asyncio.run(self._timing_burst(10))
         
         if response_times:
-            avg_time = statistics.mean(response_times)
-            max_time = max(response_times)
-            min_time = min(response_times)
+            avg_time, max_time, min_time, p95_time = _summarize_times(response_times)
             
             self.log_test("性能测试", "健康检查响应时间", True, {
                 "平均时间": f"{avg_time:.3f}s",
                 "最大时间": f"{max_time:.3f}s", 
                 "最小时间": f"{min_time:.3f}s",
+                "P95时间": f"{p95_time:.3f}s",
                 "测试次数": len(response_times)
             })
         else:
             self.log_test("性能测试", "健康检查响应时间", False, {"原因": "无有效响应"})
         
-        # 并发测试
-        def concurrent_test():
-            return self.make_request("/health")
+        # 并发测试：先预热一次连接，避免首个连接的建立开销计入耗时
+        self.make_request("/health")
+        burst_size = self.burst_size
         
-        start_time = time.time()
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            futures = [executor.submit(concurrent_test) for _ in range(10)]
-            results = [future.result() for future in as_completed(futures)]
-        end_time = time.time()
+        # 监听urllib3的连接池告警，判断连接池是否成为并发瓶颈
+        pool_logger = logging.getLogger("urllib3.connectionpool")
+        pool_full_counter = _PoolFullCounter()
+        pool_logger.addHandler(pool_full_counter)
+        try:
+            start_time = time.perf_counter()
+            futures = [self.executor.submit(self.make_request, "/health") for _ in range(burst_size)]
+            wait(futures, return_when=ALL_COMPLETED)
+            end_time = time.perf_counter()
+        finally:
+            pool_logger.removeHandler(pool_full_counter)
+        results = [future.result() for future in futures]
         
-        successful = sum(1 for r in results if r["success"])
+        if pool_full_counter.count:
+            print(f"⚠️ 并发测试中连接池已满 {pool_full_counter.count} 次，"
+                  f"建议调大CHATAI_TEST_POOL (当前: {self.pool_maxsize})")
+        
+        successful = sum(1 for r in results if r.ok)
         total_time = end_time - start_time
         
         self.log_test("性能测试", "并发请求测试", True, {
-            "成功请求": f"{successful}/10",
+            "成功请求": f"{successful}/{burst_size}",
+            "并发线程": self.max_workers,
             "总耗时": f"{total_time:.3f}s",
-            "平均每秒": f"{10/total_time:.2f} req/s"
+            "平均每秒": f"{burst_size/total_time:.2f} req/s"
         })
     
     # ===== 配置文件测试 =====
     def test_configuration(self):
         """测试配置文件"""
-        print("\n" + "="*80)
-        print("⚙️ 配置文件测试")
-        print("="*80)
+        self._print_section("⚙️ 配置文件测试")
         
         # 检查配置文件是否存在和格式正确
         config_file = "config/business_config.json"
         if os.path.exists(config_file):
             try:
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
+                config = _load_json_file(config_file)
                 
                 # 检查关键配置项
                 required_keys = ["business_types", "human_service", "login"]
@@ -776,24 +1048,20 @@ class ComprehensiveTestSuite:
                 
                 # 检查S001, S002, S003配置
                 business_types = config.get("business_types", {})
-                for service in ["S001", "S002", "S003"]:
+                required_fields = (("workflow", "工作流"), ("keywords", "关键词"), ("status_messages", "状态消息"))
+                for service in ("S001", "S002", "S003"):
                     if service in business_types:
                         service_config = business_types[service]
-                        has_workflow = "workflow" in service_config
-                        has_keywords = "keywords" in service_config
-                        has_status_messages = "status_messages" in service_config
-                        
                         self.log_test("配置文件", f"{service}配置检查", True, {
-                            "工作流": "✓" if has_workflow else "✗",
-                            "关键词": "✓" if has_keywords else "✗", 
-                            "状态消息": "✓" if has_status_messages else "✗"
+                            label: "✓" if field in service_config else "✗"
+                            for field, label in required_fields
                         })
                     else:
                         self.log_test("配置文件", f"{service}配置检查", False, {
                             "原因": f"缺少{service}配置"
                         })
                         
-            except json.JSONDecodeError as e:
+            except ValueError as e:  # JSON格式错误或空文件（无法mmap）
                 self.log_test("配置文件", "JSON格式检查", False, {
                     "错误": str(e)
                 })
@@ -807,12 +1075,12 @@ class ComprehensiveTestSuite:
     def run_comprehensive_tests(self):
         """运行全方位测试"""
         print("🤖 ChatAI 全方位测试套件")
-        print("=" * 80)
+        print(self._BANNER)
         print(f"开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"API地址: {self.base_url}")
-        print("=" * 80)
+        print(self._BANNER)
         
-        # 按顺序执行所有测试
+        # 各测试类别只向同一个服务发请求，相互独立，并发执行
         test_categories = [
             ("基础功能测试", self.test_basic_functionality),
             ("用户状态测试", self.test_user_status),
@@ -823,99 +1091,142 @@ class ComprehensiveTestSuite:
             ("订单号提取测试", self.test_order_number_extraction),
             ("多语言支持测试", self.test_multilingual_support),
             ("错误处理测试", self.test_error_handling),
-            ("性能测试", self.test_performance),
             ("配置文件测试", self.test_configuration)
         ]
         
-        for category_name, test_func in test_categories:
+        try:
+            if self.inter_test_delay:
+                # 需要给服务留出间隔时按顺序逐个执行
+                for category_name, test_func in test_categories:
+                    try:
+                        test_func()
+                    except Exception as e:
+                        self.log_test(category_name, "测试执行", False, {
+                            "异常": str(e)
+                        })
+                    time.sleep(self.inter_test_delay)
+            else:
+                with ThreadPoolExecutor(max_workers=6) as category_executor:
+                    futures = {
+                        category_executor.submit(self._run_buffered, test_func): category_name
+                        for category_name, test_func in test_categories
+                    }
+                    for future in as_completed(futures):
+                        try:
+                            future.result()
+                        except Exception as e:
+                            self.log_test(futures[future], "测试执行", False, {
+                                "异常": str(e)
+                            })
+            
+            # 性能测试的耗时会受其他并发请求干扰，在其余类别完成后单独执行
             try:
-                test_func()
-                time.sleep(1)  # 测试间隔
+                self.test_performance()
             except Exception as e:
-                self.log_test(category_name, "测试执行", False, {
+                self.log_test("性能测试", "测试执行", False, {
                     "异常": str(e)
                 })
-        
-        # 生成测试报告
-        self.generate_final_report()
+            
+            # 生成测试报告
+            self.generate_final_report()
+        finally:
+            self.close()
+    
+    def _results_with_timestamps(self) -> List[Dict]:
+        """将结果中的单调时钟刻度换算为ISO时间，仅在保存报告时调用一次"""
+        t0_wall, t0_mono = self._t0_wall, self._t0_mono
+        results = []
+        for result in self.test_results:
+            result = dict(result)
+            ns = result.pop("timestamp_ns")
+            result["timestamp"] = datetime.fromtimestamp(t0_wall + (ns - t0_mono) / 1e9).isoformat()
+            results.append(result)
+        return results
     
     def generate_final_report(self):
         """生成最终测试报告"""
-        print("\n" + "=" * 80)
-        print("📊 全方位测试报告")
-        print("=" * 80)
+        # 报告内容先收集到列表，最后一次性写出，避免逐行触发write系统调用
+        out = []
+        out.append(self._BANNER_NL)
+        out.append("📊 全方位测试报告")
+        out.append(self._BANNER)
+        
+        # 统计结果（按类别计数，总数由分类计数汇总得到）
+        totals = Counter(r["category"] for r in self.test_results)
+        passed = Counter(r["category"] for r in self.test_results if r["success"])
+        category_stats = {
+            category: {"total": total, "passed": passed[category]}
+            for category, total in totals.items()
+        }
         
-        # 统计结果
         total_tests = len(self.test_results)
-        passed_tests = sum(1 for r in self.test_results if r["success"])
+        passed_tests = sum(passed.values())
         failed_tests = total_tests - passed_tests
         success_rate = (passed_tests / total_tests * 100) if total_tests > 0 else 0
         
-        print(f"总测试数量: {total_tests}")
-        print(f"通过测试: {passed_tests}")
-        print(f"失败测试: {failed_tests}")
-        print(f"成功率: {success_rate:.1f}%")
+        out.append(f"总测试数量: {total_tests}")
+        out.append(f"通过测试: {passed_tests}")
+        out.append(f"失败测试: {failed_tests}")
+        out.append(f"成功率: {success_rate:.1f}%")
         
-        # 按类别统计
-        category_stats = {}
-        for result in self.test_results:
-            category = result["category"]
-            if category not in category_stats:
-                category_stats[category] = {"total": 0, "passed": 0}
-            category_stats[category]["total"] += 1
-            if result["success"]:
-                category_stats[category]["passed"] += 1
-        
-        print(f"\n📋 分类测试结果:")
+        out.append(f"\n📋 分类测试结果:")
         for category, stats in category_stats.items():
             rate = (stats["passed"] / stats["total"] * 100) if stats["total"] > 0 else 0
             status = "✅" if rate >= 80 else "⚠️" if rate >= 60 else "❌"
-            print(f"  {status} {category}: {stats['passed']}/{stats['total']} ({rate:.1f}%)")
+            out.append(f"  {status} {category}: {stats['passed']}/{stats['total']} ({rate:.1f}%)")
         
         # 失败测试详情
         failed_results = [r for r in self.test_results if not r["success"]]
         if failed_results:
-            print(f"\n❌ 失败测试详情:")
+            out.append(f"\n❌ 失败测试详情:")
             for result in failed_results:
-                print(f"  • [{result['category']}] {result['test_name']}")
+                out.append(f"  • [{result['category']}] {result['test_name']}")
                 if result["details"]:
                     for key, value in result["details"].items():
-                        print(f"    {key}: {value}")
+                        out.append(f"    {key}: {value}")
         
         # 保存详细报告
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        now = datetime.now()
+        timestamp = now.strftime("%Y%m%d_%H%M%S")
         report_file = f"comprehensive_test_report_{timestamp}.json"
         
+        report = {
+            "summary": {
+                "timestamp": now.isoformat(),
+                "total_tests": total_tests,
+                "passed_tests": passed_tests,
+                "failed_tests": failed_tests,
+                "success_rate": success_rate,
+                "api_url": self.base_url,
+                "results_file": self.results_file
+            },
+            "category_stats": category_stats,
+            "detailed_results": self._results_with_timestamps()
+        }
+        
         try:
-            with open(report_file, 'w', encoding='utf-8') as f:
-                json.dump({
-                    "summary": {
-                        "timestamp": datetime.now().isoformat(),
-                        "total_tests": total_tests,
-                        "passed_tests": passed_tests,
-                        "failed_tests": failed_tests,
-                        "success_rate": success_rate,
-                        "api_url": self.base_url
-                    },
-                    "category_stats": category_stats,
-                    "detailed_results": self.test_results
-                }, f, ensure_ascii=False, indent=2)
+            data = _json_dumpb_indent(report)
+            with open(report_file, 'wb') as f:
+                f.write(data)
             
-            print(f"\n📄 详细测试报告已保存到: {report_file}")
+            out.append(f"\n📄 详细测试报告已保存到: {report_file}")
         except Exception as e:
-            print(f"⚠️ 保存测试报告失败: {str(e)}")
+            out.append(f"⚠️ 保存测试报告失败: {str(e)}")
         
         # 总结
         if success_rate >= 90:
-            print(f"\n🎉 测试表现优秀！({success_rate:.1f}%)")
+            out.append(f"\n🎉 测试表现优秀！({success_rate:.1f}%)")
         elif success_rate >= 80:
-            print(f"\n👍 测试表现良好！({success_rate:.1f}%)")
+            out.append(f"\n👍 测试表现良好！({success_rate:.1f}%)")
         elif success_rate >= 60:
-            print(f"\n⚠️ 测试表现一般，建议检查失败项目 ({success_rate:.1f}%)")
+            out.append(f"\n⚠️ 测试表现一般，建议检查失败项目 ({success_rate:.1f}%)")
         else:
-            print(f"\n🚨 测试表现需要改进 ({success_rate:.1f}%)")
+            out.append(f"\n🚨 测试表现需要改进 ({success_rate:.1f}%)")
+        
+        out.append(self._BANNER)
         
-        print("=" * 80)
+        sys.stdout.write("\n".join(out) + "\n")
+        sys.stdout.flush()
 
 def main():
     """主函数"""
@@ -924,10 +1235,15 @@ def main():
     parser = argparse.ArgumentParser(description="ChatAI 全方位测试套件")
     parser.add_argument("--url", default="http://127.0.0.1:8000", 
                        help="API服务地址 (默认: http://127.0.0.1:8000)")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                       help="使用httpx.AsyncClient并发发送测试请求")
+    parser.add_argument("--delay", type=float, default=0,
+                       help="测试类别之间的间隔秒数，大于0时按顺序执行 (默认: 0)")
     
     args = parser.parse_args()
     
-    tester = ComprehensiveTestSuite(args.url)
+    tester = ComprehensiveTestSuite(args.url, use_async=args.use_async,
+                                    inter_test_delay=args.delay)
     tester.run_comprehensive_tests()
 
 if __name__ == "__main__":
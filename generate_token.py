@@ -49,7 +49,11 @@ def main():
         print(f"为用户 {user_id} 生成token...")
         
         # 生成当前时间的token
-        token = generate_token(user_id)
+        try:
+            token = generate_token(user_id)
+        except ValueError as e:
+            print(f"❌ Token生成失败: {e}")
+            return
         current_time = int(time.time())
         
         print(f"\n✅ Token生成成功!")
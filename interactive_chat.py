@@ -18,14 +18,35 @@ ChatAI 交互式多轮对话测试工具
 - 会话记录保存
 """
 
-import requests
+import asyncio
+import functools
+import httpx
 import json
+import re
 import time
-import uuid
-from datetime import datetime
-from typing import List, Dict, Any
+from collections import deque
+from typing import List, Dict, Any, NamedTuple, Optional
 import sys
 
+try:
+    import orjson
+    
+    _json_loads = orjson.loads
+    _json_dumpb = orjson.dumps
+    
+    def _json_dumpb_indent(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:  # 未安装orjson时回退到标准库json
+    _json_loads = json.loads
+    
+    def _json_dumpb(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+    
+    def _json_dumpb_indent(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+_ANSI_ESCAPE = re.compile(r'\033\[[0-9;]*m')
+
 # 彩色输出支持
 class Colors:
     HEADER = '\033[95m'
@@ -37,25 +58,73 @@ class Colors:
     ENDC = '\033[0m'
     BOLD = '\033[1m'
     UNDERLINE = '\033[4m'
+    
+    # 常用的带颜色前缀和行模板，定义时一次拼好，输出时只需format
+    USER_TAG = f"{BOLD}👤 用户:{ENDC}"
+    AI_TAG = f"{OKGREEN}🤖 AI:{ENDC}"
+    AI_HUMAN_TAG = f"{OKBLUE}🤖 AI (转人工):{ENDC}"
+    TRANSFER_NOTICE = f"{WARNING}🔄 已转接人工客服{ENDC}"
+    OK_LINE = f"{OKGREEN}✅ {{}}{ENDC}"
+    WARN_LINE = f"{WARNING}⚠️  {{}}{ENDC}"
+    FAIL_LINE = f"{FAIL}❌ {{}}{ENDC}"
+    INFO_LINE = f"{OKCYAN}{{}}{ENDC}"
+    STATUS_ITEM = f"  {{}}: {OKCYAN}{{}}{ENDC}"
+    
+    @classmethod
+    def disable(cls):
+        """输出不是终端时去掉所有颜色转义序列"""
+        for name, value in list(vars(cls).items()):
+            if not name.startswith('_') and isinstance(value, str):
+                setattr(cls, name, _ANSI_ESCAPE.sub('', value))
+
+class TurnRecord(NamedTuple):
+    """一轮对话的记录，元组存储不带实例字典，保存时再转成dict"""
+    timestamp_ns: int
+    user_message: str
+    user_images: List[str]
+    ai_response: str
+    intent: str
+    stage: str
+    transfer_human: int
+    response_images: List[str]
 
 class ChatSession:
     """对话会话管理"""
     
-    def __init__(self, api_url: str = "http://127.0.0.1:8000"):
+    # 快速测试并发发送时同时在途的最大请求数
+    MAX_CONCURRENT_SENDS = 4
+    
+    def __init__(self, api_url: str = "http://127.0.0.1:8000", history_limit: int = 50):
+        import secrets
+        
         self.api_url = api_url
-        self.session_id = f"interactive_{int(time.time())}_{uuid.uuid4().hex[:8]}"
-        self.user_id = f"test_user_{uuid.uuid4().hex[:8]}"
-        self.history = []
+        self.session_id = f"interactive_{time.monotonic_ns() // 1_000_000_000}_{secrets.token_hex(4)}"
+        self.user_id = f"test_user_{secrets.token_hex(4)}"
+        # 发给服务端的历史只保留最近history_limit条(角色, 内容)，完整记录见conversation_log
+        self.history = deque(maxlen=history_limit)
         self.language = "zh"
         self.status = 1  # 1=已登录, 0=未登录
         self.platform = "web"
         self.site = 1
         self.conversation_log = []
+        self._build_commands()
+        
+        # 输出被重定向（管道、CI日志）时不输出颜色转义序列
+        if not sys.stdout.isatty():
+            Colors.disable()
+        
+        # 复用同一个异步客户端，保持与服务端的长连接
+        self._client = httpx.AsyncClient(
+            base_url=api_url,
+            headers={"Content-Type": "application/json"},
+            timeout=30,
+            limits=httpx.Limits(max_keepalive_connections=8)
+        )
         
         print(f"{Colors.HEADER}🤖 ChatAI 交互式对话测试工具{Colors.ENDC}")
         print(f"{Colors.OKBLUE}会话ID: {self.session_id}{Colors.ENDC}")
         print(f"{Colors.OKBLUE}用户ID: {self.user_id}{Colors.ENDC}")
-        print(f"{Colors.OKCYAN}输入 'help' 查看帮助，输入 'quit' 或 'exit' 退出{Colors.ENDC}")
+        print(Colors.INFO_LINE.format("输入 'help' 查看帮助，输入 'quit' 或 'exit' 退出"))
         print("-" * 80)
     
     def print_help(self):
@@ -109,19 +178,29 @@ class ChatSession:
         """显示当前会话状态"""
         status_text = "已登录" if self.status == 1 else "未登录"
         print(f"\n{Colors.HEADER}📊 当前会话状态{Colors.ENDC}")
-        print(f"  会话ID: {Colors.OKCYAN}{self.session_id}{Colors.ENDC}")
-        print(f"  用户ID: {Colors.OKCYAN}{self.user_id}{Colors.ENDC}")
-        print(f"  语言: {Colors.OKCYAN}{self.language}{Colors.ENDC}")
-        print(f"  状态: {Colors.OKCYAN}{status_text}{Colors.ENDC}")
-        print(f"  平台: {Colors.OKCYAN}{self.platform}{Colors.ENDC}")
-        print(f"  对话轮次: {Colors.OKCYAN}{len(self.history)//2}{Colors.ENDC}")
-        print(f"  历史记录: {Colors.OKCYAN}{len(self.history)} 条{Colors.ENDC}")
+        print(Colors.STATUS_ITEM.format("会话ID", self.session_id))
+        print(Colors.STATUS_ITEM.format("用户ID", self.user_id))
+        print(Colors.STATUS_ITEM.format("语言", self.language))
+        print(Colors.STATUS_ITEM.format("状态", status_text))
+        print(Colors.STATUS_ITEM.format("平台", self.platform))
+        print(Colors.STATUS_ITEM.format("对话轮次", len(self.conversation_log)))
+        print(Colors.STATUS_ITEM.format("历史记录", f"{len(self.history)} 条"))
     
     def save_conversation(self):
         """保存对话记录"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        from datetime import datetime
+        
+        now = datetime.now()
+        timestamp = now.strftime("%Y%m%d_%H%M%S")
         filename = f"chat_log_{timestamp}.json"
         
+        # 对话过程中只记录纳秒时间戳，保存时再统一格式化
+        conversation = []
+        for entry in self.conversation_log:
+            record = {"timestamp": datetime.fromtimestamp(entry.timestamp_ns / 1e9).isoformat()}
+            record.update(zip(TurnRecord._fields[1:], entry[1:]))
+            conversation.append(record)
+        
         chat_data = {
             "session_info": {
                 "session_id": self.session_id,
@@ -129,36 +208,38 @@ class ChatSession:
                 "language": self.language,
                 "status": self.status,
                 "platform": self.platform,
-                "start_time": self.conversation_log[0]["timestamp"] if self.conversation_log else "",
-                "end_time": datetime.now().isoformat(),
+                "start_time": conversation[0]["timestamp"] if conversation else "",
+                "end_time": now.isoformat(),
                 "total_rounds": len(self.conversation_log)
             },
-            "conversation": self.conversation_log
+            "conversation": conversation
         }
         
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(chat_data, f, ensure_ascii=False, indent=2)
-            print(f"{Colors.OKGREEN}✅ 对话记录已保存到: {filename}{Colors.ENDC}")
+            data = _json_dumpb_indent(chat_data)
+            with open(filename, 'wb') as f:
+                f.write(data)
+            print(Colors.OK_LINE.format(f"对话记录已保存到: {filename}"))
         except Exception as e:
-            print(f"{Colors.FAIL}❌ 保存失败: {str(e)}{Colors.ENDC}")
+            print(Colors.FAIL_LINE.format(f"保存失败: {str(e)}"))
     
     def clear_history(self):
         """清空对话历史"""
         self.history.clear()
         self.conversation_log.clear()
-        print(f"{Colors.OKGREEN}✅ 对话历史已清空{Colors.ENDC}")
+        print(Colors.OK_LINE.format("对话历史已清空"))
     
-    def send_message(self, message: str, images: List[str] = None) -> Dict[str, Any]:
-        """发送消息到ChatAI API"""
+    async def send_message(self, message: str, images: List[str] = None,
+                           language: Optional[str] = None) -> Dict[str, Any]:
+        """发送消息到ChatAI API，language为None时使用当前会话语言"""
         payload = {
             "session_id": self.session_id,
             "user_id": self.user_id,
             "platform": self.platform,
-            "language": self.language,
+            "language": language or self.language,
             "status": self.status,
             "messages": message,
-            "history": self.history,
+            "history": [{"role": role, "content": content} for role, content in self.history],
             "site": self.site,
             "transfer_human": 0
         }
@@ -167,197 +248,259 @@ class ChatSession:
             payload["images"] = images
         
         try:
-            response = requests.post(
-                f"{self.api_url}/process",
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=30
-            )
+            # 请求体直接序列化为bytes发送，响应同样直接从bytes解析
+            response = await self._client.post("/process", content=_json_dumpb(payload))
             
             if response.status_code == 200:
-                return {"success": True, "data": response.json()}
+                return {"success": True, "data": _json_loads(response.content)}
             else:
                 return {"success": False, "error": f"HTTP {response.status_code}: {response.text}"}
                 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             return {"success": False, "error": f"请求异常: {str(e)}"}
+        except ValueError as e:
+            # 200响应但响应体不是合法JSON（例如被截断）
+            return {"success": False, "error": f"响应解析失败: {e}"}
     
-    def process_command(self, command: str) -> bool:
+    async def process_command(self, command: str) -> bool:
         """处理特殊命令，返回True表示继续对话，False表示退出"""
         command = command.strip()
         
-        if command in ['quit', 'exit']:
+        if command in ('quit', 'exit'):
             return False
         
-        elif command == 'help':
-            self.print_help()
-            
-        elif command == 'clear':
-            self.clear_history()
-            
-        elif command == 'status':
-            self.print_status()
-            
-        elif command == 'save':
-            self.save_conversation()
-            
-        elif command.startswith('/lang '):
-            lang = command.split(' ', 1)[1].strip()
-            if lang in ['zh', 'en', 'ja', 'th', 'tl']:
-                self.language = lang
-                print(f"{Colors.OKGREEN}✅ 语言已切换到: {lang}{Colors.ENDC}")
-            else:
-                print(f"{Colors.WARNING}⚠️  支持的语言: zh, en, ja, th, tl{Colors.ENDC}")
-                
-        elif command == '/login':
-            self.status = 1
-            print(f"{Colors.OKGREEN}✅ 已切换到登录状态{Colors.ENDC}")
-            
-        elif command == '/logout':
-            self.status = 0
-            print(f"{Colors.OKGREEN}✅ 已切换到未登录状态{Colors.ENDC}")
-            
-        elif command.startswith('/platform '):
-            platform = command.split(' ', 1)[1].strip()
-            if platform in ['web', 'mobile']:
-                self.platform = platform
-                print(f"{Colors.OKGREEN}✅ 平台已切换到: {platform}{Colors.ENDC}")
-            else:
-                print(f"{Colors.WARNING}⚠️  支持的平台: web, mobile{Colors.ENDC}")
-                
-        elif command.startswith('/user '):
-            user_id = command.split(' ', 1)[1].strip()
-            self.user_id = user_id
-            print(f"{Colors.OKGREEN}✅ 用户ID已设置为: {user_id}{Colors.ENDC}")
-            
-        # 场景测试命令
-        elif command == '/charge':
-            self.send_and_display("我的充值还没有到账")
-            
-        elif command == '/withdraw':
-            self.send_and_display("我的提现什么时候到账")
-            
-        elif command == '/activity':
-            self.send_and_display("我想查询首存奖励")
-            
-        elif command.startswith('/image '):
-            image_url = command.split(' ', 1)[1].strip()
-            self.send_and_display("这是我的截图", [image_url])
-            
-        elif command.startswith('/order '):
-            order_no = command.split(' ', 1)[1].strip()
-            self.send_and_display(f"我的订单号是{order_no}")
-            
-        # 快速测试命令
-        elif command == '/test_charge_18':
-            print(f"{Colors.OKCYAN}🧪 测试充值18位订单号识别...{Colors.ENDC}")
-            self.send_and_display("我的充值还没有到账")
-            self.send_and_display("我的订单号是123456789012345678")
-            
-        elif command == '/test_withdraw_19':
-            print(f"{Colors.OKCYAN}🧪 测试提现19位数字拒绝...{Colors.ENDC}")
-            self.send_and_display("我的提现还没有到账")
-            self.send_and_display("这个号码1234567890123456789是我的电话")
-            
-        elif command == '/test_image_upload':
-            print(f"{Colors.OKCYAN}🧪 测试图片上传转人工...{Colors.ENDC}")
-            self.send_and_display("我的充值还没有到账")
-            self.send_and_display("这是我的充值截图", ["https://example.com/payment-screenshot.jpg"])
-            
-        elif command == '/test_multilang':
-            print(f"{Colors.OKCYAN}🧪 测试多语言支持...{Colors.ENDC}")
-            original_lang = self.language
-            for lang, message in [
-                ("zh", "我需要充值帮助"),
-                ("en", "I need deposit help"), 
-                ("ja", "入金について教えてください"),
-                ("th", "ฉันต้องการความช่วยเหลือเรื่องการเติมเงิน")
-            ]:
-                self.language = lang
-                print(f"\n{Colors.OKCYAN}测试语言: {lang}{Colors.ENDC}")
-                self.send_and_display(message)
-            self.language = original_lang
-            
+        handler = self._exact_cmds.get(command)
+        args = ()
+        if handler is None:
+            if not command.startswith(self._prefix_tuple):
+                print(Colors.WARN_LINE.format(f"未知命令: {command}，输入 'help' 查看帮助"))
+                return True
+            # 已确认命中某个前缀，再找出对应的处理函数
+            for prefix, prefix_handler in self._prefix_cmds:
+                if command.startswith(prefix):
+                    handler = prefix_handler
+                    args = (command[len(prefix):].strip(),)
+                    break
+        
+        # 场景测试命令是协程，设置命令直接执行
+        if asyncio.iscoroutinefunction(handler):
+            await handler(*args)
         else:
-            print(f"{Colors.WARNING}⚠️  未知命令: {command}，输入 'help' 查看帮助{Colors.ENDC}")
-            
+            handler(*args)
         return True
     
-    def send_and_display(self, message: str, images: List[str] = None):
-        """发送消息并显示结果"""
-        print(f"\n{Colors.BOLD}👤 用户:{Colors.ENDC} {message}")
+    def _build_commands(self):
+        """构建命令分发表：完整命令按字典查找，带参数的命令按前缀匹配"""
+        self._exact_cmds = {
+            'help': self.print_help,
+            'clear': self.clear_history,
+            'status': self.print_status,
+            'save': self.save_conversation,
+            '/login': self._cmd_login,
+            '/logout': self._cmd_logout,
+            # 场景测试命令
+            '/charge': functools.partial(self.send_and_display, "我的充值还没有到账"),
+            '/withdraw': functools.partial(self.send_and_display, "我的提现什么时候到账"),
+            '/activity': functools.partial(self.send_and_display, "我想查询首存奖励"),
+            # 快速测试命令
+            '/test_charge_18': self._test_charge_18,
+            '/test_withdraw_19': self._test_withdraw_19,
+            '/test_image_upload': self._test_image_upload,
+            '/test_multilang': self._test_multilang,
+        }
+        self._prefix_cmds = (
+            ('/lang ', self._cmd_lang),
+            ('/platform ', self._cmd_platform),
+            ('/user ', self._cmd_user),
+            ('/image ', self._cmd_image),
+            ('/order ', self._cmd_order),
+        )
+        # 所有前缀一次性交给str.startswith在C层判断
+        self._prefix_tuple = tuple(prefix for prefix, _ in self._prefix_cmds)
+    
+    def _cmd_lang(self, lang: str):
+        """切换语言"""
+        if lang in ('zh', 'en', 'ja', 'th', 'tl'):
+            self.language = lang
+            print(Colors.OK_LINE.format(f"语言已切换到: {lang}"))
+        else:
+            print(Colors.WARN_LINE.format("支持的语言: zh, en, ja, th, tl"))
+    
+    def _cmd_login(self):
+        """切换到已登录状态"""
+        self.status = 1
+        print(Colors.OK_LINE.format("已切换到登录状态"))
+    
+    def _cmd_logout(self):
+        """切换到未登录状态"""
+        self.status = 0
+        print(Colors.OK_LINE.format("已切换到未登录状态"))
+    
+    def _cmd_platform(self, platform: str):
+        """切换平台类型"""
+        if platform in ('web', 'mobile'):
+            self.platform = platform
+            print(Colors.OK_LINE.format(f"平台已切换到: {platform}"))
+        else:
+            print(Colors.WARN_LINE.format("支持的平台: web, mobile"))
+    
+    def _cmd_user(self, user_id: str):
+        """设置用户ID"""
+        self.user_id = user_id
+        print(Colors.OK_LINE.format(f"用户ID已设置为: {user_id}"))
+    
+    async def _cmd_image(self, image_url: str):
+        """发送图片消息"""
+        await self.send_and_display("这是我的截图", [image_url])
+    
+    async def _cmd_order(self, order_no: str):
+        """发送订单号"""
+        await self.send_and_display(f"我的订单号是{order_no}")
+    
+    # 以下三个测试的第二条消息依赖第一条写入的history，必须顺序发送
+    async def _test_charge_18(self):
+        """测试充值18位订单号识别"""
+        print(Colors.INFO_LINE.format("🧪 测试充值18位订单号识别..."))
+        await self.send_and_display("我的充值还没有到账")
+        await self.send_and_display("我的订单号是123456789012345678")
+    
+    async def _test_withdraw_19(self):
+        """测试提现19位数字拒绝"""
+        print(Colors.INFO_LINE.format("🧪 测试提现19位数字拒绝..."))
+        await self.send_and_display("我的提现还没有到账")
+        await self.send_and_display("这个号码1234567890123456789是我的电话")
+    
+    async def _test_image_upload(self):
+        """测试图片上传转人工"""
+        print(Colors.INFO_LINE.format("🧪 测试图片上传转人工..."))
+        await self.send_and_display("我的充值还没有到账")
+        await self.send_and_display("这是我的充值截图", ["https://example.com/payment-screenshot.jpg"])
+    
+    async def _test_multilang(self):
+        """测试多语言支持"""
+        print(Colors.INFO_LINE.format("🧪 测试多语言支持..."))
+        pairs = [
+            ("zh", "我需要充值帮助"),
+            ("en", "I need deposit help"), 
+            ("ja", "入金について教えてください"),
+            ("th", "ฉันต้องการความช่วยเหลือเรื่องการเติมเงิน")
+        ]
+        # 各语言的探测相互独立，限流并发发送后按输入顺序显示
+        limit = asyncio.Semaphore(self.MAX_CONCURRENT_SENDS)
+        results = await asyncio.gather(
+            *[self._post_one(lang, message, limit) for lang, message in pairs],
+            return_exceptions=True
+        )
+        for (lang, message), result in zip(pairs, results):
+            if isinstance(result, Exception):
+                result = {"success": False, "error": f"请求异常: {str(result)}"}
+            print("\n" + Colors.INFO_LINE.format(f"测试语言: {lang}"))
+            self._display_user_message(message)
+            self.history.append(("user", message))
+            self._handle_result(message, None, result)
+    
+    async def _post_one(self, language: str, message: str, limit: asyncio.Semaphore) -> Dict[str, Any]:
+        """以指定语言发送一条消息，不修改会话状态"""
+        async with limit:
+            return await self.send_message(message, language=language)
+    
+    def _display_user_message(self, message: str, images: List[str] = None):
+        """显示用户消息"""
+        print(f"\n{Colors.USER_TAG} {message}")
         if images:
-            print(f"{Colors.OKCYAN}📷 图片: {', '.join(images)}{Colors.ENDC}")
+            print(Colors.INFO_LINE.format(f"📷 图片: {', '.join(images)}"))
+    
+    async def send_and_display(self, message: str, images: List[str] = None):
+        """发送消息并显示结果"""
+        self._display_user_message(message, images)
         
         # 记录到历史
-        self.history.append({"role": "user", "content": message})
+        self.history.append(("user", message))
         
         # 发送请求
-        result = self.send_message(message, images)
-        
+        result = await self.send_message(message, images)
+        self._handle_result(message, images, result)
+    
+    def _handle_result(self, message: str, images: Optional[List[str]], result: Dict[str, Any]):
+        """显示AI响应并记录到历史和对话日志"""
         if result["success"]:
             data = result["data"]
-            response = data.get("response", "")
-            stage = data.get("stage", "")
-            transfer_human = data.get("transfer_human", 0)
-            response_images = data.get("images", [])
-            intent = data.get("metadata", {}).get("intent", "")
+            response, stage, transfer_human, response_images, intent = (
+                data.get("response", ""),
+                data.get("stage", ""),
+                data.get("transfer_human", 0),
+                data.get("images") or [],
+                (data.get("metadata") or {}).get("intent", "")
+            )
             
             # 显示AI响应
             if transfer_human == 1:
-                print(f"{Colors.OKBLUE}🤖 AI (转人工):{Colors.ENDC} {response}")
-                print(f"{Colors.WARNING}🔄 已转接人工客服{Colors.ENDC}")
+                print(f"{Colors.AI_HUMAN_TAG} {response}")
+                print(Colors.TRANSFER_NOTICE)
             else:
-                print(f"{Colors.OKGREEN}🤖 AI:{Colors.ENDC} {response}")
+                print(f"{Colors.AI_TAG} {response}")
             
             # 显示附加信息
             if response_images:
-                print(f"{Colors.OKCYAN}📷 返回图片: {', '.join(response_images)}{Colors.ENDC}")
+                print(Colors.INFO_LINE.format(f"📷 返回图片: {', '.join(response_images)}"))
             
             if intent:
-                print(f"{Colors.OKCYAN}🎯 识别意图: {intent}{Colors.ENDC}")
+                print(Colors.INFO_LINE.format(f"🎯 识别意图: {intent}"))
             
             if stage:
                 stage_text = "进行中" if stage == "working" else "已完成"
-                print(f"{Colors.OKCYAN}📋 当前阶段: {stage} ({stage_text}){Colors.ENDC}")
+                print(Colors.INFO_LINE.format(f"📋 当前阶段: {stage} ({stage_text})"))
             
             # 记录到历史
-            self.history.append({"role": "AI", "content": response})
+            self.history.append(("AI", response))
             
             # 记录到对话日志
-            self.conversation_log.append({
-                "timestamp": datetime.now().isoformat(),
-                "user_message": message,
-                "user_images": images or [],
-                "ai_response": response,
-                "intent": intent,
-                "stage": stage,
-                "transfer_human": transfer_human,
-                "response_images": response_images
-            })
+            self.conversation_log.append(TurnRecord(
+                time.time_ns(), message, images or [], response,
+                intent, stage, transfer_human, response_images
+            ))
             
         else:
-            print(f"{Colors.FAIL}❌ 请求失败: {result['error']}{Colors.ENDC}")
+            print(Colors.FAIL_LINE.format(f"请求失败: {result['error']}"))
     
-    def check_api_health(self) -> bool:
+    async def check_api_health(self) -> bool:
         """检查API服务状态"""
         try:
-            response = requests.get(f"{self.api_url}/health", timeout=5)
+            response = await self._client.get("/health", timeout=5)
             if response.status_code == 200:
-                print(f"{Colors.OKGREEN}✅ ChatAI服务连接正常{Colors.ENDC}")
+                print(Colors.OK_LINE.format("ChatAI服务连接正常"))
                 return True
             else:
-                print(f"{Colors.FAIL}❌ ChatAI服务响应异常: {response.status_code}{Colors.ENDC}")
+                print(Colors.FAIL_LINE.format(f"ChatAI服务响应异常: {response.status_code}"))
                 return False
-        except requests.exceptions.RequestException as e:
-            print(f"{Colors.FAIL}❌ 无法连接到ChatAI服务: {str(e)}{Colors.ENDC}")
+        except httpx.HTTPError as e:
+            print(Colors.FAIL_LINE.format(f"无法连接到ChatAI服务: {str(e)}"))
             print(f"{Colors.WARNING}💡 请确保ChatAI服务已启动: uvicorn app:app --host 0.0.0.0 --port 8000{Colors.ENDC}")
             return False
     
     def run(self):
         """运行交互式对话"""
+        # 输入循环保持同步，只有HTTP请求在常驻的事件循环上执行：
+        # asyncio.run会接管SIGINT并取消主任务，阻塞在input()时按Ctrl+C不会抛出KeyboardInterrupt
+        loop = asyncio.new_event_loop()
+        try:
+            self._chat(loop)
+        finally:
+            try:
+                loop.run_until_complete(self._client.aclose())
+                # Ctrl+C中断的请求任务仍挂在事件循环上，取消后再关闭
+                pending = asyncio.all_tasks(loop)
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            finally:
+                loop.close()
+    
+    def _chat(self, loop: asyncio.AbstractEventLoop):
+        """检查服务状态后逐条处理用户输入"""
         # 检查API服务
-        if not self.check_api_health():
+        if not loop.run_until_complete(self.check_api_health()):
             return
         
         try:
@@ -370,18 +513,18 @@ class ChatSession:
                     
                     # 处理命令
                     if user_input.startswith('/') or user_input in ['help', 'quit', 'exit', 'clear', 'status', 'save']:
-                        if not self.process_command(user_input):
+                        if not loop.run_until_complete(self.process_command(user_input)):
                             break
                         continue
                     
-                    # 发送普通消息
-                    self.send_and_display(user_input)
+            # 发送普通消息
+                    loop.run_until_complete(self.send_and_display(user_input))
                     
                 except KeyboardInterrupt:
-                    print(f"\n{Colors.WARNING}⚠️  检测到Ctrl+C，正在退出...{Colors.ENDC}")
+                    print("\n" + Colors.WARN_LINE.format("检测到Ctrl+C，正在退出..."))
                     break
                 except EOFError:
-                    print(f"\n{Colors.WARNING}⚠️  检测到EOF，正在退出...{Colors.ENDC}")
+                    print("\n" + Colors.WARN_LINE.format("检测到EOF，正在退出..."))
                     break
                     
         finally:
@@ -392,7 +535,7 @@ class ChatSession:
                     self.save_conversation()
             
             print(f"\n{Colors.OKGREEN}👋 谢谢使用ChatAI对话测试工具！{Colors.ENDC}")
-            print(f"{Colors.OKCYAN}📊 本次会话统计: {len(self.conversation_log)} 轮对话{Colors.ENDC}")
+            print(Colors.INFO_LINE.format(f"📊 本次会话统计: {len(self.conversation_log)} 轮对话"))
 
 def main():
     """主函数"""
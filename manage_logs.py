@@ -11,9 +11,73 @@
 
 import argparse
 import json
-from datetime import datetime, timedelta
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+
+
+# 文件名关键字与日志类型的对应关系，按顺序匹配
+_LOG_TYPE_RULES = (
+    ("error", "错误日志"),
+    ("access", "访问日志"),
+    ("api", "API日志"),
+    ("all", "全量日志"),
+)
+
+# 查看日志尾部时每次向前读取的块大小
+_TAIL_CHUNK_SIZE = 64 * 1024
+
+# 清理日志时每删除多少个文件输出一次进度
+_PROGRESS_INTERVAL = 100
+
+# 超过该大小的文件删除前先让内核丢弃其页缓存
+_FADVISE_MIN_SIZE = 128 * 1024 * 1024
+
+# 并行删除日志文件的最大线程数
+_UNLINK_WORKERS = 16
+
+
+def _unlink_log(path: str, size: int):
+    """
+    删除日志文件，大文件在删除前通知内核丢弃其页缓存（仅支持posix_fadvise的平台）
+    
+    Args:
+        path: 文件路径
+        size: 文件大小（字节）
+    """
+    if size >= _FADVISE_MIN_SIZE and hasattr(os, "posix_fadvise"):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    os.unlink(path)
+
+
+def _safe_unlink_log(log_file: Dict[str, Any]) -> Tuple[str, Optional[OSError]]:
+    """
+    在线程池中删除日志文件，把异常作为结果返回而不是抛出
+    
+    Args:
+        log_file: list_logs返回的日志文件信息
+        
+    Returns:
+        Tuple[str, Optional[OSError]]: (文件路径, 删除失败时的异常)
+    """
+    try:
+        _unlink_log(log_file["file"], log_file["size"])
+        return log_file["file"], None
+    except OSError as e:
+        return log_file["file"], e
+
+
+def _format_mtime(mtime: float) -> str:
+    """格式化文件修改时间，只在输出时调用"""
+    return datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M:%S')
 
 
 class LogManager:
@@ -39,73 +103,88 @@ class LogManager:
     
     def list_logs(self) -> List[Dict[str, Any]]:
         """列出所有日志文件"""
+        return self._scan_logs()[0]
+    
+    def _scan_logs(self) -> Tuple[List[Dict[str, Any]], int, Dict[str, List[int]]]:
+        """
+        扫描日志目录，同一次遍历中累计总大小和按类型的统计
+        
+        Returns:
+            Tuple: (按修改时间倒序的日志文件列表, 总字节数, {日志类型: [文件数, 字节数]})
+        """
         if not self.log_dir.exists():
             print(f"日志目录不存在: {self.log_dir}")
-            return []
+            return [], 0, {}
         
+        # 一次scandir遍历，直接使用目录项自带的元数据；修改时间保留为时间戳，输出时再格式化
         log_files = []
-        for log_file in self.log_dir.glob("*.log*"):
-            stat = log_file.stat()
-            log_files.append({
-                "file": str(log_file),
-                "size": stat.st_size,
-                "size_mb": round(stat.st_size / 1024 / 1024, 2),
-                "modified": datetime.fromtimestamp(stat.st_mtime),
-                "type": self._get_log_type(log_file.name)
-            })
+        total_size = 0
+        type_stats = {}
+        with os.scandir(self.log_dir) as entries:
+            for entry in entries:
+                if ".log" not in entry.name:
+                    continue
+                stat = entry.stat()
+                size = stat.st_size
+                log_type = self._get_log_type(entry.name)
+                log_files.append({
+                    "file": entry.path,
+                    "size": size,
+                    "size_mb": round(size / 1024 / 1024, 2),
+                    "modified": stat.st_mtime,
+                    "type": log_type,
+                    # 轮转出的历史文件（非当前写入的.log文件）才允许清理
+                    "is_rotated": not entry.name.endswith(".log")
+                })
+                
+                total_size += size
+                stats = type_stats.get(log_type)
+                if stats is None:
+                    stats = type_stats[log_type] = [0, 0]
+                stats[0] += 1
+                stats[1] += size
         
-        return sorted(log_files, key=lambda x: x["modified"], reverse=True)
+        log_files.sort(key=lambda x: x["modified"], reverse=True)
+        return log_files, total_size, type_stats
     
     def _get_log_type(self, filename: str) -> str:
         """根据文件名获取日志类型"""
-        if "error" in filename:
-            return "错误日志"
-        elif "access" in filename:
-            return "访问日志"
-        elif "api" in filename:
-            return "API日志"
-        elif "all" in filename:
-            return "全量日志"
-        else:
-            return "其他日志"
+        for keyword, log_type in _LOG_TYPE_RULES:
+            if keyword in filename:
+                return log_type
+        return "其他日志"
     
     def show_stats(self):
         """显示日志统计信息"""
-        log_files = self.list_logs()
+        # 总大小和按类型统计在扫描目录时已一并算好
+        log_files, total_size, type_stats = self._scan_logs()
         
         if not log_files:
             print("没有找到日志文件")
             return
         
-        total_size = sum(f["size"] for f in log_files)
         total_files = len(log_files)
         
-        # 按类型统计
-        type_stats = {}
-        for f in log_files:
-            log_type = f["type"]
-            if log_type not in type_stats:
-                type_stats[log_type] = {"count": 0, "size": 0}
-            type_stats[log_type]["count"] += 1
-            type_stats[log_type]["size"] += f["size"]
-        
-        print("=" * 60)
-        print("日志统计信息")
-        print("=" * 60)
-        print(f"总文件数: {total_files}")
-        print(f"总大小: {round(total_size / 1024 / 1024, 2)} MB")
-        print(f"日志目录: {self.log_dir}")
-        print()
-        
-        print("按类型统计:")
-        for log_type, stats in type_stats.items():
-            size_mb = round(stats["size"] / 1024 / 1024, 2)
-            print(f"  {log_type}: {stats['count']} 个文件, {size_mb} MB")
-        print()
+        # 先拼好全部输出行，最后一次写入stdout
+        out = [
+            "=" * 60,
+            "日志统计信息",
+            "=" * 60,
+            f"总文件数: {total_files}",
+            f"总大小: {round(total_size / 1024 / 1024, 2)} MB",
+            f"日志目录: {self.log_dir}",
+            "",
+            "按类型统计:"
+        ]
+        for log_type, (count, size) in type_stats.items():
+            size_mb = round(size / 1024 / 1024, 2)
+            out.append(f"  {log_type}: {count} 个文件, {size_mb} MB")
+        out.append("")
         
-        print("最近的日志文件:")
+        out.append("最近的日志文件:")
         for f in log_files[:10]:  # 显示最近的10个文件
-            print(f"  {f['file']} ({f['size_mb']} MB, {f['modified'].strftime('%Y-%m-%d %H:%M:%S')})")
+            out.append(f"  {f['file']} ({f['size_mb']} MB, {_format_mtime(f['modified'])})")
+        sys.stdout.write("\n".join(out) + "\n")
     
     def cleanup(self, days: int = None, dry_run: bool = False):
         """
@@ -118,12 +197,12 @@ class LogManager:
         if days is None:
             days = self.config.get("retention_days", 30)
         
-        cutoff_date = datetime.now() - timedelta(days=days)
+        cutoff_time = time.time() - days * 86400
         log_files = self.list_logs()
         
         files_to_delete = [
             f for f in log_files 
-            if f["modified"] < cutoff_date and not f["file"].endswith(".log")
+            if f["is_rotated"] and f["modified"] < cutoff_time
         ]
         
         if not files_to_delete:
@@ -145,14 +224,17 @@ class LogManager:
             print("操作已取消")
             return
         
+        # 删除操作主要耗在系统调用上（期间释放GIL），用线程池让多个unlink同时进行
         deleted_count = 0
-        for f in files_to_delete:
-            try:
-                Path(f["file"]).unlink()
-                print(f"已删除: {f['file']}")
+        with ThreadPoolExecutor(max_workers=min(_UNLINK_WORKERS, len(files_to_delete))) as executor:
+            for path, error in executor.map(_safe_unlink_log, files_to_delete):
+                if error is not None:
+                    print(f"删除失败 {path}: {error}")
+                    continue
                 deleted_count += 1
-            except Exception as e:
-                print(f"删除失败 {f['file']}: {e}")
+                # 文件很多时逐个输出会拖慢删除，只定期输出进度
+                if deleted_count % _PROGRESS_INTERVAL == 0:
+                    print(f"已删除 {deleted_count}/{len(files_to_delete)} 个文件...")
         
         print(f"成功删除 {deleted_count} 个文件")
     
@@ -182,19 +264,44 @@ class LogManager:
             return
         
         try:
-            with open(log_file, 'r', encoding='utf-8') as f:
-                all_lines = f.readlines()
-                tail_lines = all_lines[-lines:] if len(all_lines) > lines else all_lines
-                
-                print(f"日志文件: {log_file}")
-                print(f"显示最后 {len(tail_lines)} 行:")
-                print("=" * 80)
-                
-                for line in tail_lines:
-                    print(line.rstrip())
+            tail_lines = self._read_tail(log_file, lines)
+            
+            print(f"日志文件: {log_file}")
+            print(f"显示最后 {len(tail_lines)} 行:")
+            print("=" * 80)
+            
+            for line in tail_lines:
+                print(line.rstrip())
         
         except Exception as e:
             print(f"读取日志文件失败: {e}")
+    
+    @staticmethod
+    def _read_tail(log_file: Path, lines: int) -> List[str]:
+        """
+        从文件末尾按块向前读取，直到凑够指定行数，避免把整个日志读入内存
+        
+        Args:
+            log_file: 日志文件路径
+            lines: 需要的行数
+            
+        Returns:
+            List[str]: 最后lines行内容
+        """
+        if lines <= 0:
+            return []
+        
+        with open(log_file, 'rb') as f:
+            pos = f.seek(0, os.SEEK_END)
+            buf = b""
+            # 多读一个换行符，保证最前面的不完整行会被丢弃
+            while pos > 0 and buf.count(b"\n") <= lines:
+                size = min(_TAIL_CHUNK_SIZE, pos)
+                pos -= size
+                f.seek(pos)
+                buf = f.read(size) + buf
+        
+        return [line.decode('utf-8', errors='replace') for line in buf.splitlines()[-lines:]]
 
 
 def main():
@@ -232,11 +339,13 @@ def main():
         if args.command == "list":
             log_files = log_manager.list_logs()
             if log_files:
-                print(f"{'文件名':<40} {'大小(MB)':<10} {'类型':<10} {'修改时间':<20}")
-                print("-" * 80)
-                for f in log_files:
-                    filename = Path(f["file"]).name
-                    print(f"{filename:<40} {f['size_mb']:<10.2f} {f['type']:<10} {f['modified'].strftime('%Y-%m-%d %H:%M:%S')}")
+                # 文件很多时逐行print代价较高，拼好后一次写出
+                rows = [f"{'文件名':<40} {'大小(MB)':<10} {'类型':<10} {'修改时间':<20}", "-" * 80]
+                rows.extend(
+                    f"{os.path.basename(f['file']):<40} {f['size_mb']:<10.2f} {f['type']:<10} {_format_mtime(f['modified'])}"
+                    for f in log_files
+                )
+                sys.stdout.write("\n".join(rows) + "\n")
             else:
                 print("没有找到日志文件")
         
@@ -1,6 +1,7 @@
-import hashlib
 import hmac
+import logging
 import time
+from functools import lru_cache
 from typing import Optional, Tuple
 from .logging_config import get_logger
 from .config import get_config
@@ -10,6 +11,83 @@ logger = get_logger("chatai-auth")
 # 默认密钥，实际使用时应该从配置文件读取
 DEFAULT_SECRET_KEY = "ChatAI_Secret_Key_2025"
 
+# 待签名字符串中用户ID与时间戳之间的分隔字符
+_SPECIAL_CHARS = "@#$%"
+
+# token各字段的格式约束，用于在计算签名前快速拒绝明显非法的token
+_SIGNATURE_LENGTH = 64  # HMAC-SHA256十六进制摘要长度
+_HEX_DIGITS = b"0123456789abcdef"
+_MAX_USER_ID_LENGTH = 128
+_MAX_TIMESTAMP_LENGTH = 12
+
+# 配置中密钥的UTF-8编码缓存，配置重新加载时通过clear_secret_key_cache清空
+_secret_key_bytes: Optional[bytes] = None
+
+def _get_secret_key_bytes() -> bytes:
+    """
+    获取配置文件中的签名密钥字节，编码结果会被缓存
+    
+    Returns:
+        bytes: UTF-8编码的密钥
+    """
+    global _secret_key_bytes
+    if _secret_key_bytes is None:
+        config = get_config()
+        _secret_key_bytes = config.get("auth", {}).get("secret_key", DEFAULT_SECRET_KEY).encode('utf-8')
+    return _secret_key_bytes
+
+def clear_secret_key_cache():
+    """
+    清空缓存的密钥和用它计算的签名，下次签名时重新从配置读取
+    """
+    global _secret_key_bytes
+    _secret_key_bytes = None
+    _compute_signature.cache_clear()
+
+def _sign(secret_key: bytes, user_id: str, timestamp: int) -> str:
+    """
+    计算token签名
+    
+    Args:
+        secret_key: UTF-8编码的密钥
+        user_id: 用户ID
+        timestamp: 时间戳
+        
+    Returns:
+        str: 十六进制签名
+    """
+    # 构建待签名的字符串：user_id + timestamp + 特殊字符
+    message = f"{user_id}{_SPECIAL_CHARS}{timestamp}"
+    
+    # 使用HMAC-SHA256进行签名，hmac.digest为一次性调用的C实现，不创建HMAC对象
+    return hmac.digest(
+        secret_key,
+        message.encode('utf-8'),
+        'sha256'
+    ).hex()
+
+@lru_cache(maxsize=1024)
+def _compute_signature(user_id: str, timestamp: int) -> str:
+    """
+    使用配置文件中的密钥计算token签名，同一用户在token有效期内的重复验证直接复用缓存结果
+    
+    缓存键不包含密钥，密钥变化时由clear_secret_key_cache()一并清空
+    
+    Args:
+        user_id: 用户ID
+        timestamp: 时间戳
+        
+    Returns:
+        str: 十六进制签名
+    """
+    return _sign(_get_secret_key_bytes(), user_id, timestamp)
+
+def _signature_for(user_id: str, timestamp: int, secret_key: Optional[str]) -> str:
+    """显式传入密钥时直接计算签名，不进入缓存"""
+    if secret_key is None:
+        return _compute_signature(user_id, timestamp)
+    return _sign(secret_key.encode('utf-8'), user_id, timestamp)
+
 def generate_token(user_id: str, secret_key: Optional[str] = None, timestamp: Optional[int] = None) -> str:
     """
     生成用户token
@@ -21,34 +99,30 @@ def generate_token(user_id: str, secret_key: Optional[str] = None, timestamp: Op
         
     Returns:
         str: 生成的token
+        
+    Raises:
+        ValueError: 用户ID超过verify_token接受的最大长度
     """
-    if secret_key is None:
-        config = get_config()
-        secret_key = config.get("auth", {}).get("secret_key", DEFAULT_SECRET_KEY)
+    # 与verify_token的长度上限保持一致，避免生成永远无法通过验证的token
+    if len(user_id) > _MAX_USER_ID_LENGTH:
+        raise ValueError(f"用户ID长度不能超过{_MAX_USER_ID_LENGTH}个字符")
     
     if timestamp is None:
         timestamp = int(time.time())
     
-    # 构建待签名的字符串：user_id + timestamp + 特殊字符
-    special_chars = "@#$%"
-    message = f"{user_id}{special_chars}{timestamp}"
-    
-    # 使用HMAC-SHA256进行签名
-    signature = hmac.new(
-        secret_key.encode('utf-8'),
-        message.encode('utf-8'),
-        hashlib.sha256
-    ).hexdigest()
+    signature = _signature_for(user_id, timestamp, secret_key)
     
     # 返回格式：用户ID.时间戳.签名
     token = f"{user_id}.{timestamp}.{signature}"
     
-    logger.debug(f"生成token", extra={
-        'user_id': user_id,
-        'timestamp': timestamp,
-        'token_length': len(token),
-        'token_preview': token[:20] + '...'
-    })
+    # 调试日志的extra字典和预览切片只在DEBUG级别开启时才构建
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"生成token", extra={
+            'user_id': user_id,
+            'timestamp': timestamp,
+            'token_length': len(token),
+            'token_preview': token[:20] + '...'
+        })
     
     return token
 
@@ -64,11 +138,12 @@ def verify_token(token: str, secret_key: Optional[str] = None, max_age: int = 36
     Returns:
         Tuple[bool, Optional[str], Optional[str]]: (是否有效, 用户ID, 错误信息)
     """
-    logger.debug(f"开始验证token", extra={
-        'token_length': len(token) if token else 0,
-        'token_preview': token[:20] + '...' if token and len(token) > 20 else token,
-        'max_age': max_age
-    })
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"开始验证token", extra={
+            'token_length': len(token) if token else 0,
+            'token_preview': token[:20] + '...' if token and len(token) > 20 else token,
+            'max_age': max_age
+        })
     
     if not token:
         logger.warning("Token为空")
@@ -85,6 +160,18 @@ def verify_token(token: str, secret_key: Optional[str] = None, max_age: int = 36
     
     user_id, timestamp_str, provided_signature = parts
     
+    # 签名必须是64位小写十六进制，用户ID和时间戳长度有上限，不满足的直接拒绝，不做任何哈希计算
+    if (len(provided_signature) != _SIGNATURE_LENGTH
+            or provided_signature.encode('utf-8').translate(None, _HEX_DIGITS)
+            or len(user_id) > _MAX_USER_ID_LENGTH
+            or len(timestamp_str) > _MAX_TIMESTAMP_LENGTH):
+        logger.warning(f"Token格式错误", extra={
+            'signature_length': len(provided_signature),
+            'user_id_length': len(user_id),
+            'timestamp_length': len(timestamp_str)
+        })
+        return False, None, "Token格式错误"
+    
     try:
         timestamp = int(timestamp_str)
     except ValueError:
@@ -105,15 +192,10 @@ def verify_token(token: str, secret_key: Optional[str] = None, max_age: int = 36
         })
         return False, None, "Token已过期"
     
-    # 重新生成签名进行比较
-    if secret_key is None:
-        config = get_config()
-        secret_key = config.get("auth", {}).get("secret_key", DEFAULT_SECRET_KEY)
-    
-    expected_token = generate_token(user_id, secret_key, timestamp)
-    expected_signature = expected_token.split('.')[2]
+    # 只重新计算签名部分进行比较，无需拼出完整token再拆分
+    expected_signature = _signature_for(user_id, timestamp, secret_key)
     
-    # 使用时间安全的比较方法
+    # 使用时间安全的比较方法，前面已确认签名只含十六进制字符，可直接比较字符串
     if not hmac.compare_digest(provided_signature, expected_signature):
         logger.warning(f"Token签名验证失败", extra={
             'user_id': user_id,
@@ -123,11 +205,13 @@ def verify_token(token: str, secret_key: Optional[str] = None, max_age: int = 36
         })
         return False, None, "Token签名验证失败"
     
-    logger.info(f"Token验证成功", extra={
-        'user_id': user_id,
-        'timestamp': timestamp,
-        'token_age': current_time - timestamp
-    })
+    # 验证成功是每个请求都会走的路径，只在DEBUG级别记录，失败分支仍以WARNING记录
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Token验证成功", extra={
+            'user_id': user_id,
+            'timestamp': timestamp,
+            'token_age': current_time - timestamp
+        })
     
     return True, user_id, None
 
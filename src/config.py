@@ -1,13 +1,20 @@
 import json
 import os
-from typing import Dict, List, Optional, Any
+import time
+from typing import Dict
+import orjson
 from .logging_config import get_logger
 
 # 业务配置文件路径
 BUSINESS_CONFIG_PATH = os.path.join(os.path.dirname(__file__), '../config/business_config.json')
 
-# 缓存业务配置
+# 缓存业务配置，以及加载时配置文件的修改时间
 _business_config_cache = None
+_business_config_mtime = None
+_business_config_checked_at = 0.0
+
+# 检查配置文件是否被修改的最小间隔（秒），避免每次获取配置都stat文件
+_CONFIG_CHECK_INTERVAL = 1.0
 
 def load_business_config() -> Dict:
     """
@@ -16,7 +23,14 @@ def load_business_config() -> Dict:
     Returns:
         Dict: 业务配置字典
     """
-    global _business_config_cache
+    global _business_config_cache, _business_config_mtime, _business_config_checked_at
+    
+    # 缓存有效且距上次检查不足间隔时间，直接返回
+    if _business_config_cache is not None:
+        now = time.monotonic()
+        if now - _business_config_checked_at < _CONFIG_CHECK_INTERVAL:
+            return _business_config_cache
+        _business_config_checked_at = now
     
     # 只有在日志系统初始化后才记录日志，避免循环导入
     try:
@@ -24,14 +38,25 @@ def load_business_config() -> Dict:
     except:
         logger = None
     
-    # 如果已有缓存，直接返回
+    # 如果已有缓存且配置文件未被修改（或暂时无法访问），直接返回
+    mtime = None
     if _business_config_cache is not None:
+        try:
+            mtime = os.stat(BUSINESS_CONFIG_PATH).st_mtime
+        except OSError:
+            mtime = None
+        if mtime is None or mtime == _business_config_mtime:
+            if logger:
+                logger.debug(f"使用缓存的业务配置", extra={
+                    'cache_size': len(_business_config_cache),
+                    'business_types_count': len(_business_config_cache.get('business_types', {}))
+                })
+            return _business_config_cache
+        
         if logger:
-            logger.debug(f"使用缓存的业务配置", extra={
-                'cache_size': len(_business_config_cache),
-                'business_types_count': len(_business_config_cache.get('business_types', {}))
+            logger.info(f"检测到配置文件已修改，重新加载", extra={
+                'config_path': BUSINESS_CONFIG_PATH
             })
-        return _business_config_cache
     
     try:
         if logger:
@@ -541,18 +566,28 @@ def load_business_config() -> Dict:
                 })
             
             _business_config_cache = default_config
+            _business_config_mtime = os.stat(BUSINESS_CONFIG_PATH).st_mtime
         else:
-            # 读取配置文件
-            with open(BUSINESS_CONFIG_PATH, 'r', encoding='utf-8') as f:
-                _business_config_cache = json.load(f)
+            # 读取配置文件，修改时间取自同一个文件描述符，保证与读到的内容一致
+            with open(BUSINESS_CONFIG_PATH, 'rb') as f:
+                raw = f.read()
+                mtime = os.fstat(f.fileno()).st_mtime
+            _business_config_cache = orjson.loads(raw)
+            _business_config_mtime = mtime
             
             if logger:
                 logger.info(f"业务配置文件加载成功", extra={
                     'config_path': BUSINESS_CONFIG_PATH,
                     'business_types_count': len(_business_config_cache.get('business_types', {})),
-                    'config_size': len(str(_business_config_cache))
+                    'config_size': len(raw)
                 })
         
+        _business_config_checked_at = time.monotonic()
+        
+        # 密钥可能随配置变化，清空认证模块缓存的密钥（延迟导入避免循环依赖）
+        from .auth import clear_secret_key_cache
+        clear_secret_key_cache()
+        
         return _business_config_cache
     except Exception as e:
         error_msg = f"加载业务配置文件失败: {str(e)}"
@@ -563,7 +598,12 @@ def load_business_config() -> Dict:
             }, exc_info=True)
         else:
             print(error_msg)
-        # 返回空配置
+        # 文件被修改后解析失败（例如正在编辑）时继续使用旧配置，首次加载失败返回空配置
+        if _business_config_cache is not None:
+            # 记下失败文件的修改时间，文件再次变化前不再重复解析和记录错误
+            if mtime is not None:
+                _business_config_mtime = mtime
+            return _business_config_cache
         return {}
 
 def reload_config() -> Dict:
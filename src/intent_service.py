@@ -254,8 +254,7 @@ def update_intents(new_intents: List[str], admin_token: str) -> Dict[str, Any]:
                 "message": "意图列表长度不能超过50个"
             }
         
-        # 更新全局意图列表
-        global PREDEFINED_INTENTS
+        # 更新全局意图列表（原地修改列表，无需global声明）
         old_intents = PREDEFINED_INTENTS.copy()
         PREDEFINED_INTENTS.clear()
         PREDEFINED_INTENTS.extend(new_intents)
@@ -0,0 +1,132 @@
+"""
+意图识别常量模块
+
+提供 /chat/recognize_intent 接口使用的默认意图列表和各语言提示词模板
+"""
+
+import os
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional, Tuple
+
+# 预定义意图列表
+DEFAULT_INTENTS = (
+    "没有收到款项",
+    "收到款项订单已回调",
+    "等待1-7个工作日退款", 
+    "提供转账人信息",
+    "提现处理中",
+    "已出款成功",
+    "重新提交提现申请",
+    "等待第三方支付",
+    "客户收款卡已限额",
+    "客户收款卡号错误",
+    "客户收款银行维护",
+    "修改客户收款卡",
+    "客户卡号异常",
+    "请日切后重新提交订单",
+    "订单款项已回冲",
+    "订单已重新出款"
+)
+
+# 默认意图集合，用于O(1)成员检查
+DEFAULT_INTENTS_SET = frozenset(DEFAULT_INTENTS)
+
+# 默认意图列表拼接结果，避免每次请求重复join
+DEFAULT_INTENTS_JOINED = ', '.join(DEFAULT_INTENTS)
+
+# 各语言的意图识别提示词模板
+PROMPT_TEMPLATES = {
+    "en": (
+        "You are an intent recognition assistant. Please select the most matching intent from the intent list below for the user input. Only return the intent itself, do not return other content.\n"
+        "User input: {text}\n"
+        "Available intents: {intents}\n"
+        "Please only return the most matching intent string. If no suitable intent is found, return an empty string."
+    ),
+    "th": (
+        "คุณเป็นผู้ช่วยในการจดจำความตั้งใจ กรุณาเลือกความตั้งใจที่ตรงกับการป้อนข้อมูลของผู้ใช้มากที่สุดจากรายการความตั้งใจด้านล่าง ส่งคืนเฉพาะความตั้งใจเท่านั้น ไม่ต้องส่งคืนเนื้อหาอื่น\n"
+        "การป้อนข้อมูลของผู้ใช้: {text}\n"
+        "ความตั้งใจที่มีอยู่: {intents}\n"
+        "กรุณาส่งคืนเฉพาะสตริงความตั้งใจที่ตรงกันมากที่สุด หากไม่พบความตั้งใจที่เหมาะสม ให้ส่งคืนสตริงว่าง"
+    ),
+    "tl": (
+        "Ikaw ay isang intent recognition assistant. Mangyaring piliin ang pinakatugmang intent mula sa listahan ng intent sa ibaba para sa input ng user. Ibalik lang ang intent mismo, huwag magbalik ng ibang content.\n"
+        "Input ng user: {text}\n"
+        "Available na mga intent: {intents}\n"
+        "Mangyaring ibalik lang ang pinakatugmang intent string. Kung walang suitable na intent, ibalik ang empty string."
+    ),
+    "ja": (
+        "あなたは意図認識アシスタントです。以下の意図リストからユーザー入力に最も適合する意図を選択してください。意図そのもののみを返し、その他の内容は返さないでください。\n"
+        "ユーザー入力: {text}\n"
+        "利用可能な意図: {intents}\n"
+        "最も適合する意図文字列のみを返してください。適切な意図が見つからない場合は、空文字列を返してください。"
+    ),
+    "zh": (
+        "你是一个意图识别助手。请从下面的意图列表中选择最符合用户输入的意图，只返回意图本身，不要返回其他内容。\n"
+        "用户输入: {text}\n"
+        "可选意图: {intents}\n"
+        "请只返回最匹配的意图字符串，如果没有合适的意图请返回空字符串。"
+    ),
+}
+
+
+@lru_cache(maxsize=128)
+def join_intents(intents: Tuple[str, ...]) -> str:
+    """
+    拼接自定义意图列表，调用方重复发送相同列表时直接复用缓存结果
+    
+    Args:
+        intents: 意图元组
+        
+    Returns:
+        str: 逗号分隔的意图字符串
+    """
+    return ', '.join(intents)
+
+
+# 意图识别结果缓存：相同语言、文本和候选意图的请求直接复用大模型结果
+# 有效期通过环境变量 INTENT_CACHE_TTL（秒）配置，设为0则关闭缓存
+INTENT_CACHE_TTL = int(os.getenv("INTENT_CACHE_TTL", "300"))
+INTENT_CACHE_MAX_SIZE = 1024
+_intent_cache: "OrderedDict[Tuple[str, str, str], Tuple[float, str]]" = OrderedDict()
+
+
+def get_cached_intent(key: Tuple[str, str, str]) -> Optional[str]:
+    """
+    获取缓存的意图识别结果
+    
+    Args:
+        key: (语言, 用户文本, 候选意图字符串)
+        
+    Returns:
+        Optional[str]: 缓存的意图，未命中或已过期返回None
+    """
+    entry = _intent_cache.get(key)
+    if entry is None:
+        return None
+    
+    expires_at, intent = entry
+    if expires_at < time.monotonic():
+        _intent_cache.pop(key, None)
+        return None
+    
+    _intent_cache.move_to_end(key)
+    return intent
+
+
+def cache_intent(key: Tuple[str, str, str], intent: str) -> None:
+    """
+    缓存意图识别结果，超出容量时淘汰最久未使用的条目
+    
+    Args:
+        key: (语言, 用户文本, 候选意图字符串)
+        intent: 识别出的意图
+    """
+    if INTENT_CACHE_TTL <= 0:
+        return
+    
+    _intent_cache[key] = (time.monotonic() + INTENT_CACHE_TTL, intent)
+    _intent_cache.move_to_end(key)
+    if len(_intent_cache) > INTENT_CACHE_MAX_SIZE:
+        _intent_cache.popitem(last=False)
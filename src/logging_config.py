@@ -9,24 +9,28 @@
 - 结构化日志格式
 """
 
+import atexit
 import logging
 import logging.handlers
 import os
 import json
+import queue
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, Any, Optional
 import glob
 
 
+# JSON日志中额外输出的extra字段
+_EXTRA_FIELDS = ('session_id', 'user_id', 'request_id', 'api_name', 'order_no', 'activity', 'error_type')
+_MISSING = object()
+
+
 class JSONFormatter(logging.Formatter):
     """JSON格式的日志格式化器"""
     
     def format(self, record):
         """格式化日志记录为JSON格式"""
-        # 创建日志记录的副本，避免修改原始记录
-        record_dict = record.__dict__.copy()
-        
         log_entry = {
             'timestamp': datetime.fromtimestamp(record.created).isoformat(),
             'level': record.levelname,
@@ -43,15 +47,45 @@ class JSONFormatter(logging.Formatter):
         if record.exc_info:
             log_entry['exception'] = self.formatException(record.exc_info)
         
-        # 添加额外的字段（避免覆盖基础字段）
-        extra_fields = ['session_id', 'user_id', 'request_id', 'api_name', 'order_no', 'activity', 'error_type']
-        for field in extra_fields:
-            if hasattr(record, field) and field not in log_entry:
-                log_entry[field] = getattr(record, field)
+        # 添加额外的字段（额外字段与基础字段不重名，无需检查覆盖）
+        for field in _EXTRA_FIELDS:
+            value = getattr(record, field, _MISSING)
+            if value is not _MISSING:
+                log_entry[field] = value
         
         return json.dumps(log_entry, ensure_ascii=False)
 
 
+class _LocalQueueHandler(logging.handlers.QueueHandler):
+    """进程内队列处理器，只提前合并消息参数，格式化和异常信息交给后台线程处理"""
+    
+    def prepare(self, record):
+        """解析消息参数后直接入队，保留exc_info供文件处理器生成结构化异常"""
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+
+class _RoutingQueueListener(logging.handlers.QueueListener):
+    """后台日志监听器，按logger名称把记录分发到各自配置的处理器"""
+    
+    def __init__(self, log_queue, routes: Dict[str, list]):
+        super().__init__(log_queue, respect_handler_level=True)
+        self.routes = routes
+    
+    def handle(self, record):
+        """将记录交给该logger配置的处理器，并遵循处理器级别"""
+        record = self.prepare(record)
+        # 子logger传播上来的记录按最近的已配置父logger路由
+        name = record.name
+        while name not in self.routes and '.' in name:
+            name = name.rsplit('.', 1)[0]
+        for handler in self.routes.get(name, ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
 class LogConfig:
     """日志配置类"""
     
@@ -63,6 +97,9 @@ class LogConfig:
             config: 日志配置字典
         """
         self.config = config or self._get_default_config()
+        self.listener = None
+        self._queue_handler = None
+        self._routes = {}
         self.log_dir = Path(self.config.get('log_dir', 'logs'))
         self.log_dir.mkdir(exist_ok=True)
         
@@ -89,6 +126,7 @@ class LogConfig:
             'backup_count': 10,
             'retention_days': 30,
             'separate_error_log': True,
+            'queue_output': True,
             'loggers': {
                 'chatai-api': {
                     'level': 'INFO',
@@ -101,6 +139,10 @@ class LogConfig:
                 'chatai-api-calls': {
                     'level': 'INFO',
                     'handlers': ['file_api']
+                },
+                'chatai-auth': {
+                    'level': 'INFO',
+                    'handlers': ['console', 'file_all', 'file_error']
                 }
             }
         }
@@ -171,6 +213,13 @@ class LogConfig:
             file_api_handler.setFormatter(formatter)
             handlers['file_api'] = file_api_handler
         
+        # 启用队列输出时，请求线程只负责入队，格式化和写文件由后台监听线程完成
+        use_queue = self.config.get('queue_output', True)
+        if use_queue:
+            log_queue = queue.SimpleQueue()
+            queue_handler = _LocalQueueHandler(log_queue)
+            routes = {}
+        
         # 配置特定的logger
         for logger_name, logger_config in self.config.get('loggers', {}).items():
             logger = logging.getLogger(logger_name)
@@ -181,12 +230,39 @@ class LogConfig:
                 logger.removeHandler(handler)
             
             # 添加指定的处理器
-            for handler_name in logger_config.get('handlers', []):
-                if handler_name in handlers:
-                    logger.addHandler(handlers[handler_name])
+            logger_handlers = [
+                handlers[handler_name]
+                for handler_name in logger_config.get('handlers', [])
+                if handler_name in handlers
+            ]
+            if use_queue:
+                routes[logger_name] = logger_handlers
+                logger.addHandler(queue_handler)
+            else:
+                for handler in logger_handlers:
+                    logger.addHandler(handler)
             
             # 防止日志传播到根logger
             logger.propagate = False
+        
+        if use_queue:
+            self._queue_handler = queue_handler
+            self._routes = routes
+            self.listener = _RoutingQueueListener(log_queue, routes)
+            self.listener.start()
+            atexit.register(self.shutdown)
+    
+    def shutdown(self):
+        """停止后台日志监听线程，确保队列中剩余的日志全部写出"""
+        if self.listener is not None:
+            listener, self.listener = self.listener, None
+            # 先把各logger切回直接写处理器，停止后记录的日志（如worker退出、atexit中的日志）不会进入无人读取的队列
+            for logger_name, logger_handlers in self._routes.items():
+                logger = logging.getLogger(logger_name)
+                logger.removeHandler(self._queue_handler)
+                for handler in logger_handlers:
+                    logger.addHandler(handler)
+            listener.stop()
     
     def _create_rotating_file_handler(self, filename: Path, level: int):
         """创建轮转文件处理器"""
@@ -267,10 +343,20 @@ def init_logging(config: Optional[Dict[str, Any]] = None) -> LogConfig:
         LogConfig: 日志配置实例
     """
     global _log_config
+    if _log_config is not None:
+        _log_config.shutdown()
     _log_config = LogConfig(config)
     return _log_config
 
 
+def shutdown_logging():
+    """
+    停止后台日志监听线程，在应用关闭时调用
+    """
+    if _log_config is not None:
+        _log_config.shutdown()
+
+
 def get_logger(name: str) -> logging.Logger:
     """
     获取logger实例
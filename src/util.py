@@ -7,6 +7,9 @@ from .config import get_config, get_message_by_language
 from .logging_config import get_logger, log_api_call
 from .auth import verify_token
 
+# 合法的用户登录状态
+VALID_USER_STATUSES = frozenset((0, 1))
+
 class MessageRequest(BaseModel):
     session_id: str
     user_id: str
@@ -25,7 +28,7 @@ class MessageRequest(BaseModel):
     @field_validator('status')
     @classmethod
     def validate_status(cls, v):
-        if v not in [0, 1]:
+        if v not in VALID_USER_STATUSES:
             raise ValueError("status必须是0（未登录）或1（已登录）")
         return v
     
@@ -78,6 +81,41 @@ class IntentRecognitionResponse(BaseModel):
     intent: str      # 识别出的意图，无法识别返回空字符串
 
 
+# 共享的HTTP客户端，由应用lifespan创建和关闭，复用连接池
+# 大模型调用和内部后端服务调用分别使用独立的客户端（后端服务不校验证书）
+_shared_http_client: Optional[httpx.AsyncClient] = None
+_shared_backend_client: Optional[httpx.AsyncClient] = None
+
+def init_http_client() -> httpx.AsyncClient:
+    """
+    创建共享的HTTP客户端，在应用启动时调用
+    :return: 大模型调用使用的共享httpx.AsyncClient
+    """
+    global _shared_http_client, _shared_backend_client
+    if _shared_http_client is None:
+        _shared_http_client = httpx.AsyncClient(
+            timeout=30,
+            limits=httpx.Limits(max_keepalive_connections=100, max_connections=200),
+        )
+    if _shared_backend_client is None:
+        _shared_backend_client = httpx.AsyncClient(
+            verify=False,
+            timeout=10,
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=100),
+        )
+    return _shared_http_client
+
+async def close_http_client():
+    """
+    关闭共享的HTTP客户端，在应用关闭时调用
+    """
+    global _shared_http_client, _shared_backend_client
+    clients = (_shared_http_client, _shared_backend_client)
+    _shared_http_client = _shared_backend_client = None
+    for client in clients:
+        if client is not None:
+            await client.aclose()
+
 # 通用调用其他后端服务接口的方法
 async def call_backend_service(
     url: str,
@@ -109,29 +147,39 @@ async def call_backend_service(
     })
     
     try:
-        async with httpx.AsyncClient(verify=False, timeout=timeout) as client:
-            response = await client.request(
+        if _shared_backend_client is not None:
+            response = await _shared_backend_client.request(
                 method=method,
                 url=url,
                 params=params,
                 json=json_data,
                 headers=headers,
+                timeout=timeout,
             )
-            
-            call_time = time.time() - start_time
-            
-            response.raise_for_status()  # 请求失败会抛异常
-            response_data = response.json()
-            
-            logger.info(f"后端服务调用成功", extra={
-                'url': url,
-                'method': method,
-                'status_code': response.status_code,
-                'response_time': round(call_time, 3),
-                'response_size': len(str(response_data))
-            })
-            
-            return response_data
+        else:
+            async with httpx.AsyncClient(verify=False, timeout=timeout) as client:
+                response = await client.request(
+                    method=method,
+                    url=url,
+                    params=params,
+                    json=json_data,
+                    headers=headers,
+                )
+        
+        call_time = time.time() - start_time
+        
+        response.raise_for_status()  # 请求失败会抛异常
+        response_data = response.json()
+        
+        logger.info(f"后端服务调用成功", extra={
+            'url': url,
+            'method': method,
+            'status_code': response.status_code,
+            'response_time': round(call_time, 3),
+            'response_size': len(str(response_data))
+        })
+        
+        return response_data
             
     except httpx.HTTPStatusError as e:
         call_time = time.time() - start_time
@@ -163,6 +211,7 @@ async def call_openapi_model(
     temperature: Optional[float] = None,
     max_tokens: Optional[int] = None,
     api_url: Optional[str] = None,
+    client: Optional[httpx.AsyncClient] = None,
 ) -> str:
     """
     发送请求给OpenAI大模型API，获取回复
@@ -172,6 +221,7 @@ async def call_openapi_model(
     :param temperature: 采样温度，如果为None则从配置文件读取默认值
     :param max_tokens: 最大回复tokens数，如果为None则从配置文件读取默认值
     :param api_url: API请求地址，如果为None则从配置文件读取
+    :param client: HTTP客户端，如果为None则使用应用共享的客户端，未初始化时临时创建
     :return: 模型回复文本
     """
     logger = get_logger("chatai-api")
@@ -249,27 +299,32 @@ async def call_openapi_model(
     log_api_call("openai_chat_completion", "system", model=model, prompt_length=len(prompt))
     
     try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            resp = await client.post(api_url, headers=headers, json=payload)
-            
-            call_time = time.time() - start_time
-            
-            resp.raise_for_status()
-            data = resp.json()
-            
-            # 解析回复文本（根据OpenAI API结构）
-            response_content = data["choices"][0]["message"]["content"]
-            
-            logger.info(f"OpenAI模型调用成功", extra={
-                'model': model,
-                'prompt_length': len(prompt),
-                'response_length': len(response_content),
-                'response_time': round(call_time, 3),
-                'usage_tokens': data.get('usage', {}).get('total_tokens', 0),
-                'status_code': resp.status_code
-            })
-            
-            return response_content
+        if client is None:
+            client = _shared_http_client
+        if client is not None:
+            resp = await client.post(api_url, headers=headers, json=payload, timeout=30)
+        else:
+            async with httpx.AsyncClient(timeout=30) as temp_client:
+                resp = await temp_client.post(api_url, headers=headers, json=payload)
+        
+        call_time = time.time() - start_time
+        
+        resp.raise_for_status()
+        data = resp.json()
+        
+        # 解析回复文本（根据OpenAI API结构）
+        response_content = data["choices"][0]["message"]["content"]
+        
+        logger.info(f"OpenAI模型调用成功", extra={
+            'model': model,
+            'prompt_length': len(prompt),
+            'response_length': len(response_content),
+            'response_time': round(call_time, 3),
+            'usage_tokens': data.get('usage', {}).get('total_tokens', 0),
+            'status_code': resp.status_code
+        })
+        
+        return response_content
             
     except httpx.HTTPStatusError as e:
         call_time = time.time() - start_time
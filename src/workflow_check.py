@@ -2,7 +2,8 @@
 工作流检查模块
 """
 
-from typing import List, Dict, Any
+import re
+from typing import List, Dict, Any, Tuple
 from src.util import call_openapi_model  # 异步方法
 from src.config import get_config
 
@@ -126,6 +127,36 @@ category信息解读指南（针对S003活动查询）：
 只返回编号（key），不要返回其他内容。"""
     return prompt.strip()
 
+# 各语言业务关键词编译后的正则，按业务类型顺序排列；配置对象变化（重新加载）时整体重建
+_keyword_patterns: Dict[str, List[Tuple[str, "re.Pattern"]]] = {}
+_keyword_patterns_config = None
+
+def _get_keyword_patterns(config: Dict, language: str) -> List[Tuple[str, "re.Pattern"]]:
+    """
+    获取指定语言下每个业务类型的关键词正则，同一业务类型的所有关键词合并为一个正则一次扫描
+    Args:
+        config: 当前业务配置
+        language: 语言
+    Returns:
+        List[Tuple[str, re.Pattern]]: (业务类型key, 关键词正则)列表
+    """
+    global _keyword_patterns, _keyword_patterns_config
+    if _keyword_patterns_config is not config:
+        _keyword_patterns = {}
+        _keyword_patterns_config = config
+    
+    patterns = _keyword_patterns.get(language)
+    if patterns is None:
+        patterns = []
+        for bkey, btype in config.get("business_types", {}).items():
+            keywords = btype.get("keywords", {}).get(language, [])
+            if keywords:
+                patterns.append((bkey, re.compile("|".join(map(re.escape, keywords)))))
+        # language来自请求，只缓存配置中确有关键词的语言，避免任意语言字符串让缓存无限增长
+        if patterns:
+            _keyword_patterns[language] = patterns
+    return patterns
+
 def match_intent_by_keywords(messages: str, language: str) -> str:
     """
     通过关键词匹配业务类型
@@ -135,13 +166,9 @@ def match_intent_by_keywords(messages: str, language: str) -> str:
     Returns:
         str: 匹配到的业务类型 key，未匹配到返回空字符串
     """
-    config = get_config()
-    business_types = config.get("business_types", {})
-    for bkey, btype in business_types.items():
-        keywords = btype.get("keywords", {}).get(language, [])
-        for kw in keywords:
-            if kw in messages:
-                return bkey
+    for bkey, pattern in _get_keyword_patterns(get_config(), language):
+        if pattern.search(messages):
+            return bkey
     return ""
 
 async def identify_intent(messages: str, history: List[Dict[str, Any]], language: str, category: Dict[str, str] = None) -> str:
@@ -214,8 +241,6 @@ async def identify_stage(intent: str, messages: str, history: List[Dict[str, Any
     
     # 对于S001/S002业务类型，优先检查是否包含18位订单号
     if intent in ["S001", "S002"]:
-        import re
-        
         # 查找所有数字序列
         number_sequences = re.findall(r'\d+', messages)
         # 检查是否有18位数字
@@ -58,6 +58,35 @@ async def test_token_validation():
     assert not is_valid, "伪造签名的token不应该通过验证"
     print("✅ 伪造签名token验证正确拒绝")
 
+async def test_malformed_token_fast_reject():
+    """测试签名格式和长度不合法的token被直接拒绝"""
+    print("\n=== 测试格式不合法Token ===")
+    
+    user_id = "test_user_malformed"
+    token = generate_token(user_id)
+    token_user_id, timestamp_str, signature = token.split('.')
+    
+    # 签名长度错误
+    is_valid, _, error_msg = verify_token(f"{token_user_id}.{timestamp_str}.{signature[:-1]}")
+    assert not is_valid and error_msg == "Token格式错误", f"签名长度错误的token应被拒绝: {error_msg}"
+    print("✅ 签名长度错误token验证正确拒绝")
+    
+    # 签名含非十六进制字符
+    is_valid, _, error_msg = verify_token(f"{token_user_id}.{timestamp_str}.{'g' + signature[1:]}")
+    assert not is_valid and error_msg == "Token格式错误", f"签名含非十六进制字符的token应被拒绝: {error_msg}"
+    print("✅ 非十六进制签名token验证正确拒绝")
+    
+    # 用户ID超长
+    long_user_id = "u" * 129
+    is_valid, _, error_msg = verify_token(f"{long_user_id}.{timestamp_str}.{signature}")
+    assert not is_valid and error_msg == "Token格式错误", f"用户ID超长的token应被拒绝: {error_msg}"
+    try:
+        generate_token(long_user_id)
+    except ValueError:
+        print("✅ 超长用户ID验证和生成均正确拒绝")
+    else:
+        assert False, "超长用户ID不应该生成token"
+
 async def test_expired_token():
     """测试过期token"""
     print("\n=== 测试过期Token ===")
@@ -210,6 +239,7 @@ async def run_all_tests():
     try:
         await test_token_generation()
         await test_token_validation()
+        await test_malformed_token_fast_reject()
         await test_expired_token()
         await test_message_request_validation()
         await test_unauthenticated_user()